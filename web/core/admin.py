@@ -6,8 +6,13 @@ from django.core.urlresolvers import reverse, NoReverseMatch
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
 
+# 3rd Party
+from timezone_field import TimeZoneField
+
 # Local Apps
-from .widgets import VerboseForeignKeyRawIdWidget
+from .models import BaseModelMixin
+from .streaming import StreamingJSONResponse
+from .widgets import CachedTimezoneSelect, VerboseForeignKeyRawIdWidget
 
 csrf_protect_m = method_decorator(csrf_protect)
 
@@ -28,6 +33,7 @@ class HyperlinkedRawIdAdminModel(admin.ModelAdmin):
 
 class BaseModelAdmin(HyperlinkedRawIdAdminModel, admin.ModelAdmin):
 
+    actions = ['export_as_json']
     additional_object_tool_excludes = ()
     change_form_template = 'core/templates/admin/change_form.html'
     change_list_template = 'core/templates/admin/change_list.html'
@@ -72,12 +78,34 @@ class BaseModelAdmin(HyperlinkedRawIdAdminModel, admin.ModelAdmin):
             context['additional_object_tools'] = self.additional_object_tools(obj)
         return super(BaseModelAdmin, self).render_change_form(request, context, add, change, form_url, obj)
 
+    def formfield_for_choice_field(self, db_field, request=None, **kwargs):
+        # Fields with choices skip ``formfield_overrides``, so swap the widget in here.
+        if isinstance(db_field, TimeZoneField) and db_field.name not in self.radio_fields:
+            kwargs.setdefault('widget', CachedTimezoneSelect)
+        return super(BaseModelAdmin, self).formfield_for_choice_field(db_field, request, **kwargs)
+
+    def get_actions(self, request):
+        actions = super(BaseModelAdmin, self).get_actions(request)
+        # Exports are shaped by ``get_serialization_excludes()``, which only
+        # ``BaseModelMixin`` models have.
+        if not issubclass(self.model, BaseModelMixin):
+            actions.pop('export_as_json', None)
+        return actions
+
     @csrf_protect_m
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context["additional_list_actions"] = self.additional_list_actions()
         return super(BaseModelAdmin, self).changelist_view(request, extra_context)
 
+    def export_as_json(self, request, queryset):
+        """
+        Admin action streaming the selected records as a JSON download.
+        """
+        filename = '%s.json' % (self.admin_view_info,)
+        return StreamingJSONResponse(queryset, filename=filename)
+    export_as_json.short_description = "Export selected as JSON"
+
     def additional_list_actions(self):
         return []
 
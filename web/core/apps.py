@@ -0,0 +1,22 @@
+from __future__ import unicode_literals
+
+# Django
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def invalidate_content_type_repo(sender, **kwargs):
+    # Imported here since ``core.utils`` pulls in models.
+    from core.utils import ContentTypeRepo
+    ContentTypeRepo().invalidate()
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from core.cache import serialized_object_cache
+        from core.invalidation import invalidation_bus
+
+        post_migrate.connect(invalidate_content_type_repo, dispatch_uid='core.invalidate_content_type_repo')
+        invalidation_bus.subscribe(serialized_object_cache.handle_invalidation)
@@ -0,0 +1,342 @@
+from __future__ import unicode_literals
+import copy
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+
+# Targets of ``manage.py benchmark``, by name. See ``benchmark()``.
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """
+    Registers a benchmark target. Targets are called with ``number``, the number of
+    calls to time per round, and return an ``OrderedDict`` of ``label: stats``,
+    typically built with ``measure()``.
+
+    Usage:
+        @benchmark('widgets')
+        def bench_widgets(number):
+            return OrderedDict([
+                ('render', measure(lambda: widget.render('name', 'value'), number)),
+            ])
+    """
+    def decorator(fnc):
+        BENCHMARKS[name] = fnc
+        return fnc
+    return decorator
+
+
+def measure(fnc, number=100, repeat=5):
+    """
+    Times ``repeat`` rounds of ``number`` calls to ``fnc``, and returns the best and
+    median time per call, in milliseconds.
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fnc()
+        rounds.append((time.perf_counter() - start) * 1000.0 / number)
+
+    rounds.sort()
+    return OrderedDict([
+        ('best_ms', round(rounds[0], 4)),
+        ('median_ms', round(rounds[len(rounds) // 2], 4)),
+    ])
+
+
+@benchmark('timezone_choices')
+def bench_timezone_choices(number):
+    import pytz
+    from django import forms
+    from django.db.models.fields import BLANK_CHOICE_DASH
+    from timezone_field import TimeZoneField
+
+    from core import models
+    from core.widgets import CachedTimezoneSelect
+
+    tz = pytz.timezone('America/New_York')
+    select = forms.Select(choices=BLANK_CHOICE_DASH + TimeZoneField.CHOICES)
+    cached_select = CachedTimezoneSelect()
+    cached_select.is_required = False
+    cached_select.render('timezone', tz)
+
+    def build_timezone_choices():
+        models._timezone_choices = None
+        return models.get_timezone_choices()
+
+    timezone_choices = models.get_timezone_choices()
+    try:
+        build_stats = measure(build_timezone_choices, number)
+    finally:
+        models._timezone_choices = timezone_choices
+
+    return OrderedDict([
+        ('build_pytz_choices', measure(lambda: [(pytz.timezone(name), name) for name in pytz.common_timezones], number)),
+        ('get_timezone_choices_cold', build_stats),
+        ('get_timezone_choices_warm', measure(models.get_timezone_choices, number)),
+        ('render_select', measure(lambda: select.render('timezone', tz), number)),
+        ('render_cached_select', measure(lambda: cached_select.render('timezone', tz), number)),
+    ])
+
+
+BOOT_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+from django.conf import settings
+# Warm up below, so that ``boot_ms`` never includes it whatever the settings say.
+settings.WARMUP_ON_BOOT = False
+import core.wsgi
+booted = time.perf_counter()
+if %(warmup)r:
+    from core.warmup import warmup
+    warmup()
+print(json.dumps({
+    'boot_ms': (booted - start) * 1000,
+    'ready_ms': (time.perf_counter() - start) * 1000,
+    'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def run_boot(should_warmup=False, should_trace_imports=False):
+    """
+    Boots ``core.wsgi`` in a fresh interpreter using the current settings module.
+    Returns ``(stats, stderr,)``, ``stats`` being what ``BOOT_SCRIPT`` printed.
+    """
+    from django.conf import settings
+
+    args = [sys.executable]
+    if should_trace_imports:
+        args += ['-X', 'importtime']
+    args += ['-c', BOOT_SCRIPT % {'warmup': should_warmup}]
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+    process = subprocess.run(args, cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    return json.loads(process.stdout.strip().splitlines()[-1]), process.stderr
+
+
+def parse_import_times(stderr, top=10):
+    """
+    Returns ``[(package, self_ms, modules,), ...]`` for the ``top`` costliest
+    packages in the output of ``python -X importtime``: the self time of every
+    module imported, nested or not, summed by top-level package. Per-package sums
+    show where boot time goes even when it's all imported under one entry point.
+    """
+    totals = OrderedDict()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue  # The header.
+        package = name.strip().split('.')[0]
+        self_us, modules = totals.get(package, (0, 0,))
+        totals[package] = (self_us + int(own), modules + 1,)
+    found = [(package, self_us / 1000.0, modules,) for package, (self_us, modules) in totals.items()]
+    return sorted(found, key=lambda item: item[1], reverse=True)[:top]
+
+
+@benchmark('boot')
+def bench_boot(number):
+    """
+    Cold boots of a worker, with and without ``core.warmup``, each in a new
+    interpreter. Runs ``min(number, 5)`` boots per mode, then one more under
+    ``-X importtime`` to list the packages whose imports cost the most.
+    """
+    results = OrderedDict()
+    for label, should_warmup in (('boot', False,), ('boot_warmup', True,),):
+        runs = sorted((run_boot(should_warmup)[0] for _ in range(max(1, min(number, 5)))), key=lambda run: run['ready_ms'])
+        results[label] = OrderedDict([
+            ('best_ms', round(runs[0]['ready_ms'], 1)),
+            ('median_ms', round(runs[len(runs) // 2]['ready_ms'], 1)),
+            ('maxrss_kb', runs[len(runs) // 2]['maxrss_kb']),
+        ])
+
+    _, stderr = run_boot(should_trace_imports=True)
+    for package, self_ms, modules in parse_import_times(stderr):
+        results['import %s' % (package,)] = OrderedDict([('self_ms', round(self_ms, 1)), ('modules', modules)])
+    return results
+
+
+PREFORK_SCRIPT = """
+import io, json, os, sys, time
+import %(module)s as entry_point
+
+def smaps_rollup():
+    stats = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Dirty'):
+                    stats[key.lower() + '_kb'] = int(value.split()[0])
+    except IOError:
+        pass
+    return stats
+
+children = []
+for _ in range(%(workers)d):
+    pid = os.fork()
+    if pid == 0:
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': %(path)r, 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+            'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+        }
+        start = time.perf_counter()
+        b''.join(entry_point.application(environ, lambda status, headers, exc_info=None: None))
+        stats = dict(first_request_ms=(time.perf_counter() - start) * 1000, **smaps_rollup())
+        sys.stdout.write(json.dumps(stats) + '\\n')
+        sys.stdout.flush()
+        os._exit(0)
+    children.append(pid)
+
+for pid in children:
+    os.waitpid(pid, 0)
+"""
+
+
+@benchmark('prefork')
+def bench_prefork(number):
+    """
+    Forks workers from a master that loaded ``core.wsgi`` or ``core.wsgi_prefork``,
+    and reports each worker's first request latency on ``BENCHMARK_PREFORK_PATH``,
+    and its RSS, PSS and private dirty memory once that request is served. PSS and
+    private dirty memory show how much stays shared copy-on-write. Linux only.
+    """
+    from django.conf import settings
+
+    results = OrderedDict()
+    for label, module in (('wsgi', 'core.wsgi',), ('wsgi_prefork', 'core.wsgi_prefork',),):
+        script = PREFORK_SCRIPT % {
+            'module': module,
+            'workers': max(1, min(number, 4)),
+            'path': getattr(settings, 'BENCHMARK_PREFORK_PATH', '/admin/login/'),
+        }
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        process = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                                 stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        workers = [json.loads(line) for line in process.stdout.splitlines() if line.startswith('{')]
+
+        stats = OrderedDict()
+        for key in ('first_request_ms', 'rss_kb', 'pss_kb', 'private_dirty_kb',):
+            values = sorted(worker[key] for worker in workers if key in worker)
+            if values:
+                stats['median_' + key] = round(values[len(values) // 2], 1)
+        results[label] = stats
+    return results
+
+
+def make_template_backend(name, should_cache_loaders):
+    """
+    Returns a ``DjangoTemplates`` backend configured like ``TEMPLATES[0]``, with
+    its loaders cached or not.
+    """
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    params = copy.deepcopy(settings.TEMPLATES[0])
+    params.pop('BACKEND')
+    params['NAME'] = name
+    options = params.setdefault('OPTIONS', {})
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    params['APP_DIRS'] = False
+    options['loaders'] = [('django.template.loaders.cached.Loader', loaders,)] if should_cache_loaders else loaders
+    return DjangoTemplates(params)
+
+
+@benchmark('templates')
+def bench_templates(number):
+    """
+    Looks up and renders ``users/profile-edit.html`` (which extends ``base.html``)
+    for a signed in user, as ``OwnProfileView`` does: with filesystem loaders, with
+    cached loaders, and with cached loaders plus ``{% objectcache %}`` fragments.
+    """
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+    from django.utils import timezone
+
+    from users.forms import UserProfileForm
+    from users.models import User
+
+    user = User(pk=1, username='benchmark', email='benchmark@example.com', updated_at=timezone.now())
+    request = RequestFactory().get('/my-profile/')
+    request.user = user
+
+    def render(backend):
+        form = UserProfileForm(instance=user)
+        return backend.get_template('users/profile-edit.html').render({'form': form}, request)
+
+    uncached = make_template_backend('benchmark-uncached', should_cache_loaders=False)
+    cached = make_template_backend('benchmark-cached', should_cache_loaders=True)
+
+    results = OrderedDict()
+    with override_settings(TEMPLATE_FRAGMENT_CACHE_ENABLED=False):
+        results['filesystem_loaders'] = measure(lambda: render(uncached), number)
+        results['cached_loaders'] = measure(lambda: render(cached), number)
+    with override_settings(TEMPLATE_FRAGMENT_CACHE_ENABLED=True):
+        render(cached)
+        results['cached_loaders_fragments'] = measure(lambda: render(cached), number)
+    return results
+
+
+@benchmark('hashing')
+def bench_hashing(number):
+    """
+    Password checks, as made on every login, with the preferred hasher: inline in one
+    thread, then from ``PASSWORD_HASHING_POOL_SIZE`` threads through the hashing pool.
+    Also times the fast hasher used by tests. Runs ``min(number, 50)`` checks per
+    round, as each one can take tens of milliseconds.
+    """
+    import threading
+    from django.conf import settings
+    from django.contrib.auth.hashers import check_password, make_password
+    from django.utils.module_loading import import_string
+
+    from users.hashers import hashing_pool
+
+    checks = max(1, min(number, 50))
+    encoded = make_password('benchmark')
+    fast_encoded = make_password('benchmark', hasher=import_string(settings.FAST_PASSWORD_HASHER)())
+
+    results = OrderedDict()
+    inline = measure(lambda: check_password('benchmark', encoded), checks, repeat=3)
+    inline['logins_per_sec_per_core'] = round(1000.0 / inline['median_ms'], 1)
+    results['inline'] = inline
+
+    size = hashing_pool.size
+    if size:
+        hashing_pool.check_password('benchmark', encoded)  # Starts the pool.
+
+        def work():
+            for _ in range(checks):
+                hashing_pool.check_password('benchmark', encoded)
+
+        threads = [threading.Thread(target=work) for _ in range(size)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logins_per_sec = size * checks / (time.perf_counter() - start)
+        results['pooled'] = OrderedDict([
+            ('pool_size', size),
+            ('logins_per_sec', round(logins_per_sec, 1)),
+            ('logins_per_sec_per_core', round(logins_per_sec / min(size, os.cpu_count() or 1), 1)),
+        ])
+
+    fast = measure(lambda: check_password('benchmark', fast_encoded), number)
+    fast['logins_per_sec_per_core'] = round(1000.0 / fast['median_ms'], 1) if fast['median_ms'] else None
+    results['fast_hasher'] = fast
+    return results
@@ -0,0 +1,340 @@
+from __future__ import unicode_literals
+import pickle
+import threading
+import zlib
+
+# Django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Local Apps
+from core.invalidation import invalidation_bus
+from core.utils import ContentTypeRepo, LRUCache
+
+
+class SerializedObjectCache(object):
+    """
+    Stores the output of ``BaseModelMixin.serialize()`` in a Django cache backend.
+
+    Entries are keyed on ``(model, pk, cache_uuid)``, so an object is serialized
+    once per change to one of its ``flush_cache_fields`` rather than once per
+    request. Stale entries are never read again and simply age out of the backend.
+
+    Objects without a ``pk`` or a ``cache_uuid`` (anything not inheriting from
+    ``CacheUUIDModel``, or unsaved instances) are serialized on every call.
+    """
+    key_prefix = 'serialized'
+
+    def __init__(self, alias=None, timeout=None):
+        self.alias = alias or getattr(settings, 'SERIALIZATION_CACHE_ALIAS', 'default')
+        self.timeout = timeout if timeout is not None else getattr(settings, 'SERIALIZATION_CACHE_TIMEOUT', 60 * 60 * 24)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def make_key(self, obj):
+        return self.make_key_from_parts(obj._meta.app_label, obj._meta.model_name, obj.pk, obj.cache_uuid)
+
+    def make_key_from_parts(self, app_label, model_name, pk, cache_uuid):
+        return '%s:%s.%s:%s:%s' % (self.key_prefix, app_label, model_name, pk, cache_uuid,)
+
+    def is_cacheable(self, obj):
+        return bool(obj.pk and getattr(obj, 'cache_uuid', None))
+
+    def get(self, obj):
+        """
+        Returns the serialized version of ``obj``, pulling from the cache if possible.
+        """
+        if not self.is_cacheable(obj):
+            return obj._serialize()
+
+        key = self.make_key(obj)
+        serialized = self.backend.get(key)
+        if serialized is not None:
+            self.hits += 1
+            return serialized
+
+        self.misses += 1
+        serialized = obj._serialize()
+        self.backend.set(key, serialized, self.timeout)
+        return serialized
+
+    def get_many(self, objs, prepare_misses=None):
+        """
+        Returns a list of serialized objects in the same order as ``objs``, using a
+        single ``get_many`` and a single ``set_many`` against the cache backend.
+
+        Arguments:
+        objs              {iterable}    The records to serialize
+        prepare_misses    {callable}    OPTIONAL. Called with the list of records that
+                                        must actually be serialized, before any of
+                                        them are. Useful for batching relation lookups.
+        """
+        objs = list(objs)
+        keys = [self.make_key(obj) if self.is_cacheable(obj) else None for obj in objs]
+        found = self.backend.get_many([key for key in keys if key])
+
+        if prepare_misses is not None:
+            misses = [obj for obj, key in zip(objs, keys) if key not in found]
+            if misses:
+                prepare_misses(misses)
+
+        to_set = {}
+        results = []
+        for obj, key in zip(objs, keys):
+            if key in found:
+                self.hits += 1
+                results.append(found[key])
+                continue
+
+            serialized = obj._serialize()
+            if key:
+                self.misses += 1
+                to_set[key] = serialized
+            results.append(serialized)
+
+        if to_set:
+            self.backend.set_many(to_set, self.timeout)
+        return results
+
+    def delete(self, obj):
+        if self.is_cacheable(obj):
+            self.backend.delete(self.make_key(obj))
+
+    def handle_invalidation(self, event):
+        """
+        ``core.invalidation`` subscriber dropping the entry of the rotated-out UUID,
+        which matters when the backend is local to each worker process.
+        """
+        if event is None or not event.old_uuid:
+            return
+
+        try:
+            content_type = ContentTypeRepo().get_content_type_by_id(event.content_type_id)
+        except KeyError:
+            return
+        self.backend.delete(self.make_key_from_parts(content_type.app_label, content_type.model, event.pk, event.old_uuid))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / total if total else 0.0,
+        }
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+
+serialized_object_cache = SerializedObjectCache()
+
+
+# Per-process local tiers of ``TwoTierCache``, keyed by name. Django builds one
+# backend instance per thread, but all threads of a process share the tier.
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+def get_local_tier(name, maxsize, ttl):
+    with _local_tiers_lock:
+        tier = _local_tiers.get(name)
+        if tier is None:
+            tier = _local_tiers[name] = LRUCache(maxsize=maxsize, ttl=ttl)
+            invalidation_bus.subscribe(lambda event: tier.clear() if event is None else None)
+        return tier
+
+
+class CompressedValue(object):
+    """
+    Wraps a zlib-compressed pickle stored by ``TwoTierCache`` in the shared tier.
+    Not a ``bytes`` subclass, since memcached clients hand those back as plain
+    ``bytes``; the wrapper itself is pickled, so it survives every backend.
+    """
+    __slots__ = ('payload',)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __getstate__(self):
+        return self.payload
+
+    def __setstate__(self, state):
+        self.payload = state
+
+
+class TwoTierCache(BaseCache):
+    """
+    Django cache backend layering a small in-process LRU in front of another,
+    shared, cache backend. Reads served by the local tier never touch the network.
+
+    The local tier holds entries for at most ``LOCAL_TIMEOUT`` seconds, so a value
+    changed or deleted by another process may be read stale for that long. With
+    ``LOCAL_TIMEOUT=None`` local entries only expire along with the timeout they
+    were set with, if any, or when evicted: only for keys that are never
+    overwritten. ``0`` disables the local tier. It suits
+    read-mostly data with versioned keys, such as ``serialized_object_cache`` whose
+    keys change along with ``cache_uuid``. ``incr()``/``decr()`` and ``add()`` always
+    go to the shared tier.
+
+    Values are stored locally as pickles, so callers can't mutate a cached value
+    under each other's feet. Pickles of at least ``COMPRESS_MIN_LENGTH`` bytes are
+    zlib-compressed before being sent to the shared tier.
+
+    Usage:
+        CACHES = {
+            'shared': {'BACKEND': 'django.core.cache.backends.memcached.PyLibMCCache', ...},
+            'default': {
+                'BACKEND': 'core.cache.TwoTierCache',
+                'LOCATION': 'shared',
+                'OPTIONS': {'LOCAL_MAX_ENTRIES': 1000, 'LOCAL_TIMEOUT': 5},
+            },
+        }
+
+    The ``LOCATION`` is the alias of the shared backend. The local tier is dropped
+    whenever ``core.invalidation`` reports lost events.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.compress_min_length = options.get('COMPRESS_MIN_LENGTH', 1024)
+        self.compress_level = options.get('COMPRESS_LEVEL', 6)
+        self.local = get_local_tier(location, options.get('LOCAL_MAX_ENTRIES', 1000), self.local_timeout)
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def get_local_ttl(self, timeout):
+        """
+        Returns how long to keep an entry set with ``timeout`` locally: seconds,
+        ``None`` for no expiry, or ``0`` meaning it must not be kept at all.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = None
+        if timeout is not None and timeout <= 0:
+            return 0
+        if self.local_timeout is None:
+            return timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def encode(self, value):
+        """
+        Returns ``(pickled, stored,)``: what the local tier and the shared tier keep.
+        """
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self.compress_min_length is not None and len(pickled) >= self.compress_min_length:
+            return pickled, CompressedValue(zlib.compress(pickled, self.compress_level))
+        return pickled, value
+
+    def decode(self, stored):
+        """
+        Returns ``(value, pickled,)`` for a value read from the shared tier.
+        """
+        if isinstance(stored, CompressedValue):
+            pickled = zlib.decompress(stored.payload)
+            return pickle.loads(pickled), pickled
+        return stored, pickle.dumps(stored, pickle.HIGHEST_PROTOCOL)
+
+    def set_local(self, key, pickled, timeout):
+        ttl = self.get_local_ttl(timeout)
+        if ttl == 0:
+            self.local.delete(key)
+        else:
+            self.local.set(key, pickled, ttl)
+
+    def make_key(self, key, version=None):
+        # Entries are namespaced by the shared backend, so mirror its keys locally.
+        return self.shared.make_key(key, version=version)
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version=version)
+        pickled = self.local.get(local_key)
+        if pickled is not None:
+            return pickle.loads(pickled)
+
+        stored = self.shared.get(key, version=version)
+        if stored is None:
+            return default
+
+        value, pickled = self.decode(stored)
+        self.set_local(local_key, pickled, DEFAULT_TIMEOUT)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self.local.get(self.make_key(key, version=version))
+            if pickled is not None:
+                found[key] = pickle.loads(pickled)
+            else:
+                missing.append(key)
+
+        if missing:
+            for key, stored in self.shared.get_many(missing, version=version).items():
+                value, pickled = self.decode(stored)
+                self.set_local(self.make_key(key, version=version), pickled, DEFAULT_TIMEOUT)
+                found[key] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        pickled, stored = self.encode(value)
+        self.shared.set(key, stored, timeout=timeout, version=version)
+        self.set_local(self.make_key(key, version=version), pickled, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        to_store = {}
+        for key, value in data.items():
+            pickled, to_store[key] = self.encode(value)
+            self.set_local(self.make_key(key, version=version), pickled, timeout)
+        return self.shared.set_many(to_store, timeout=timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        pickled, stored = self.encode(value)
+        added = self.shared.add(key, stored, timeout=timeout, version=version)
+        if added:
+            self.set_local(self.make_key(key, version=version), pickled, timeout)
+        return added
+
+    def delete(self, key, version=None):
+        self.local.delete(self.make_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.local.delete(self.make_key(key, version=version))
+        return self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self.make_key(key, version=version) in self.local:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self.make_key(key, version=version))
+        return self.shared.incr(key, delta=delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.local.delete(self.make_key(key, version=version))
+        return self.shared.decr(key, delta=delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def clear_local(self):
+        self.local.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
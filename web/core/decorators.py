@@ -1,16 +1,25 @@
 from __future__ import unicode_literals
+import functools
+import hashlib
+import pickle
+import threading
 import time
-from contextlib import contextmanager
 
 # Django
-from django.conf import settings
+from django.core.cache import caches
 
 # Local Apps
-from core.utils import smoosh_args
+from core.profiling import span
+from core.utils import LRUCache, get_request_cache, make_memoize_key
 
 
 def stopwatch(thing_to_time):
     """
+    Times a function or block with ``perf_counter_ns`` into the labeled histograms
+    of ``core.profiling.timings`` (p50/p95/p99). Nested stopwatches form a tree,
+    printed under ``DEBUG``. In production only ``STOPWATCH_SAMPLE_RATE`` of root
+    stopwatches are timed, and sampling off costs next to nothing.
+
     Decorator usage:
         @stopwatch
         def my_func():
@@ -25,29 +34,296 @@ def stopwatch(thing_to_time):
 
         this_stuff_isnt_timed()
     """
-
-    @contextmanager
-    def benchmark():
-        start = time.time()
-        yield
-        end = time.time()
-
-        if settings.DEBUG:
-            print("%s : %0.3f seconds" % (thing_to_time, end - start))
-
     if hasattr(thing_to_time, "__call__"):
+        name = fnc_name(thing_to_time)
+
+        @functools.wraps(thing_to_time)
         def timed(*args, **kwargs):
-            with benchmark():
+            with span(name):
                 return thing_to_time(*args, **kwargs)
         return timed
     else:
-        return benchmark()
+        return span(thing_to_time)
+
+
+INSTANCE = 'instance'
+PROCESS = 'process'
+SHARED = 'shared'
+REQUEST = 'request'
+
+_MISSING = object()
+
+
+class BaseMemoizer(object):
+    """
+    Holds the cache behind one ``@memoize`` decorated function. Subclasses decide
+    where values live (``get_store()``) and which arguments make up the key.
+    """
+    # Striped locks bound memory while keeping unrelated keys from blocking each other.
+    lock_stripes = 64
+
+    def __init__(self, fnc, maxsize=None, ttl=None, should_lock=False, **kwargs):
+        self.fnc = fnc
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.should_lock = should_lock
+        self._locks = [threading.Lock() for _ in range(self.lock_stripes)]
+
+    @property
+    def name(self):
+        return fnc_name(self.fnc)
+
+    def get_store(self, args):
+        raise NotImplementedError
+
+    def key_args(self, args):
+        return args
+
+    def make_key(self, args, kwargs):
+        return make_memoize_key(self.key_args(args), kwargs)
+
+    def __call__(self, *args, **kwargs):
+        store = self.get_store(args)
+        if store is None:
+            return self.fnc(*args, **kwargs)
+
+        try:
+            key = self.make_key(args, kwargs)
+        except TypeError:
+            # Unhashable (or, for the shared scope, unpicklable) arguments can't be
+            # keyed safely, so the call isn't cached.
+            return self.fnc(*args, **kwargs)
+        value = store.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        if self.should_lock:
+            return self.compute_locked(store, key, args, kwargs)
+        return self.compute(store, key, args, kwargs)
+
+    def compute(self, store, key, args, kwargs):
+        value = self.fnc(*args, **kwargs)
+        store.set(key, value)
+        return value
+
+    def compute_locked(self, store, key, args, kwargs):
+        """
+        Stampede protection: only one thread computes a given key at a time, the
+        others wait for it and then read its result.
+        """
+        with self._locks[hash(key) % self.lock_stripes]:
+            value = store.get(key, _MISSING, should_count=False)
+            if value is not _MISSING:
+                return value
+            return self.compute(store, key, args, kwargs)
+
+    def invalidate(self, *args, **kwargs):
+        """
+        Forgets the value cached for the given arguments, or everything when no
+        arguments are given.
+        """
+        store = self.get_store(args)
+        if store is None:
+            return
+        if self.key_args(args) or kwargs:
+            store.delete(self.make_key(args, kwargs))
+        else:
+            store.clear()
+
+    def cache_info(self, *args):
+        store = self.get_store(args)
+        return store.info() if store is not None else None
+
+
+class InstanceMemoizer(BaseMemoizer):
+    """
+    Caches on the instance the method is called on (``self._memoize_cache``), so
+    values live exactly as long as the instance does.
+    """
+
+    def get_store(self, args):
+        instance = args[0]
+        stores = getattr(instance, '_memoize_cache', None)
+        if stores is None:
+            stores = instance._memoize_cache = {}
+
+        try:
+            return stores[self.fnc.__name__]
+        except KeyError:
+            return stores.setdefault(self.fnc.__name__, LRUCache(maxsize=self.maxsize, ttl=self.ttl))
+
+    def key_args(self, args):
+        return args[1:]
+
+
+class ProcessMemoizer(BaseMemoizer):
+    """
+    Caches in one LRU shared by every thread of the process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = LRUCache(maxsize=self.maxsize, ttl=self.ttl)
+
+    def get_store(self, args):
+        return self.store
+
+
+class CachedNone(object):
+    """
+    Stands for a cached ``None``, since Django's cache backends can't tell a stored
+    ``None`` from a miss. Picklable, and recognized with ``isinstance()``.
+    """
+
+
+class CacheBackendStore(object):
+    """
+    Adapts a Django cache backend to the ``LRUCache`` interface used by memoizers.
+    Keys must come from ``make_key()``, which hashes the pickled argument key.
+    """
+
+    def __init__(self, alias, prefix, ttl=None):
+        self.alias = alias
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def make_key(self, key):
+        try:
+            raw = pickle.dumps(key, protocol=2)
+        except (pickle.PicklingError, AttributeError) as e:
+            raise TypeError("Cannot pickle memoize key: {}".format(e))
+        return '%s:%s' % (self.prefix, hashlib.md5(raw).hexdigest(),)
+
+    def get(self, key, default=None, should_count=True):
+        value = self.backend.get(key, _MISSING)
+        if value is _MISSING:
+            if should_count:
+                self.misses += 1
+            return default
+
+        if should_count:
+            self.hits += 1
+        return None if isinstance(value, CachedNone) else value
+
+    def set(self, key, value):
+        value = CachedNone() if value is None else value
+        self.backend.set(key, value, self.ttl)
+
+    def add_lock(self, key, timeout):
+        return self.backend.add('%s:lock' % (key,), 1, timeout)
+
+    def release_lock(self, key):
+        self.backend.delete('%s:lock' % (key,))
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        raise ValueError("The shared memoize scope can only invalidate specific arguments.")
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'maxsize': None, 'currsize': None}
+
+
+class SharedMemoizer(BaseMemoizer):
+    """
+    Caches in a Django cache backend, shared by every process using it. Values must
+    be picklable. ``maxsize`` is left to the backend's own eviction.
+    """
+    lock_timeout = 30
+    lock_poll_interval = 0.05
+
+    def __init__(self, fnc, cache_alias='default', **kwargs):
+        super().__init__(fnc, **kwargs)
+        self.store = CacheBackendStore(cache_alias, 'memoize:%s' % (self.name,), ttl=self.ttl)
+
+    def get_store(self, args):
+        return self.store
+
+    def make_key(self, args, kwargs):
+        return self.store.make_key(super().make_key(args, kwargs))
+
+    def compute_locked(self, store, key, args, kwargs):
+        """
+        Stampede protection across processes: the first caller takes a lock key with
+        ``cache.add()``, the others poll for its result for up to ``lock_timeout``
+        seconds before giving up and computing it themselves.
+        """
+        if store.add_lock(key, self.lock_timeout):
+            try:
+                return self.compute(store, key, args, kwargs)
+            finally:
+                store.release_lock(key)
+
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            time.sleep(self.lock_poll_interval)
+            value = store.get(key, _MISSING, should_count=False)
+            if value is not _MISSING:
+                return value
+        return self.compute(store, key, args, kwargs)
 
 
-def memoize(fnc):
+class RequestMemoizer(BaseMemoizer):
     """
-    Decorator that accepts a variable name at which to cache the results
-    of this function. Now honoring parameters!
+    Caches for the duration of the current request only, using the cache installed
+    by ``core.middleware.RequestCache``. Outside of a request nothing is cached.
+    """
+
+    def get_store(self, args):
+        return get_request_cache()
+
+    def make_key(self, args, kwargs):
+        # All request-scoped functions share one store, so the key carries the name.
+        return (self.name,) + super().make_key(args, kwargs)
+
+    def invalidate(self, *args, **kwargs):
+        store = self.get_store(args)
+        if store is None:
+            return
+        if args or kwargs:
+            store.delete(self.make_key(args, kwargs))
+        else:
+            store.delete_matching(lambda key: key[0] == self.name)
+
+
+MEMOIZERS = {
+    INSTANCE: InstanceMemoizer,
+    PROCESS: ProcessMemoizer,
+    SHARED: SharedMemoizer,
+    REQUEST: RequestMemoizer,
+}
+
+
+def fnc_name(fnc):
+    return '%s.%s' % (fnc.__module__, getattr(fnc, '__qualname__', fnc.__name__),)
+
+
+def memoize(fnc=None, scope=INSTANCE, maxsize=None, ttl=None, should_lock=False, cache_alias='default'):
+    """
+    Decorator caching the results of a function, keyed on its (typed) arguments.
+
+    Arguments:
+    scope          {string}    OPTIONAL. Where values live:
+                                 ``instance`` (default) - on ``self``, for methods
+                                 ``process``            - one LRU for the whole process
+                                 ``shared``             - the ``cache_alias`` Django cache backend
+                                 ``request``            - the current request, see
+                                                          ``core.middleware.RequestCache``
+    maxsize        {int}       OPTIONAL. LRU bound on the number of cached values.
+    ttl            {int}       OPTIONAL. Seconds before a cached value expires.
+    should_lock    {bool}      OPTIONAL. Stampede protection; concurrent callers wait for
+                               a single computation instead of all computing the value.
+    cache_alias    {string}    OPTIONAL. Backend used by the ``shared`` scope.
+
+    The decorated function grows ``invalidate(*args, **kwargs)`` and ``cache_info()``.
+    For the ``instance`` scope, pass the instance first to either of them.
 
     Usage:
 
@@ -63,6 +339,14 @@ def memoize(fnc):
                 print "doing property work!"
                 return "Star Wars"
 
+        @memoize(scope='process', maxsize=1024, ttl=60)
+        def exchange_rate(currency):
+            ...
+
+        @memoize(scope='request')
+        def get_permissions(user):
+            ...
+
 
         >>> my_obj = SomeClass()
         >>> my_obj.get_title()
@@ -78,29 +362,24 @@ def memoize(fnc):
         >>>
         >>> my_obj.favorite_trilogy
         >>> "Star Wars"
+        >>>
+        >>> SomeClass.get_title.invalidate(my_obj)
+        >>> exchange_rate.invalidate('EUR')
+        >>> exchange_rate.cache_info()
+        >>> {'hits': 12, 'misses': 3, 'maxsize': 1024, 'currsize': 3}
 
     """
-    def wrapper(self, *args, **kwargs):
-        # Make sure the memoize cache
-        if not hasattr(self, '_memoize_cache'):
-            self._memoize_cache = {}
-
-        cache_attr_name = fnc.__name__
-        self._memoize_cache.setdefault(cache_attr_name, {})
-
-        key_suffix = smoosh_args(*args, **kwargs)
-
-        try:
-            # Hope for a cache hit
-            return self._memoize_cache[cache_attr_name][key_suffix]
-        except KeyError:
-            self._memoize_cache[cache_attr_name][key_suffix] = None
+    if fnc is None:
+        return functools.partial(memoize, scope=scope, maxsize=maxsize, ttl=ttl,
+                                 should_lock=should_lock, cache_alias=cache_alias)
 
-        # Calculate the value
-        val = fnc(self, *args, **kwargs)
+    memoizer = MEMOIZERS[scope](fnc, maxsize=maxsize, ttl=ttl, should_lock=should_lock, cache_alias=cache_alias)
 
-        # Save it for later
-        self._memoize_cache[cache_attr_name][key_suffix] = val
-        return val
+    @functools.wraps(fnc)
+    def wrapper(*args, **kwargs):
+        return memoizer(*args, **kwargs)
 
+    wrapper.invalidate = memoizer.invalidate
+    wrapper.cache_info = memoizer.cache_info
+    wrapper.memoizer = memoizer
     return wrapper
@@ -0,0 +1,166 @@
+from __future__ import unicode_literals
+import logging
+import threading
+import time
+from collections import namedtuple
+
+# Django
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+logger = logging.getLogger('core.invalidation')
+
+
+InvalidationEvent = namedtuple('InvalidationEvent', ['content_type_id', 'pk', 'old_uuid', 'new_uuid'])
+
+
+class InvalidationBus(object):
+    """
+    Broadcasts ``cache_uuid`` rotations to every worker process, so that in-process
+    caches can evict entries of stale objects.
+
+    Events are published after commit into the ``CACHE_INVALIDATION_ALIAS`` cache
+    backend as a sequence of numbered keys. Each worker polls the sequence (see
+    ``core.middleware.PollInvalidations``) at most every
+    ``CACHE_INVALIDATION_POLL_INTERVAL`` seconds and hands new events to its
+    subscribers. The backend must be shared by the workers and have an atomic
+    ``incr()`` (memcached, redis).
+
+    Subscribers are called with one ``InvalidationEvent`` at a time, or with ``None``
+    when everything must go: events were lost (expired before being read), or too
+    many rows changed at once to list them.
+    """
+    seq_key = 'core:invalidation:seq'
+    event_key = 'core:invalidation:event:%d'
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._last_seq = None
+        self._last_poll = 0.0
+        self._missing_seq = None
+
+    @property
+    def is_enabled(self):
+        return getattr(settings, 'CACHE_INVALIDATION_BUS_ENABLED', False)
+
+    @property
+    def backend(self):
+        return caches[getattr(settings, 'CACHE_INVALIDATION_ALIAS', 'default')]
+
+    def subscribe(self, callback):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    @property
+    def max_backlog(self):
+        return getattr(settings, 'CACHE_INVALIDATION_MAX_BACKLOG', 1000)
+
+    def publish(self, content_type_id, pk, old_uuid, new_uuid):
+        self.publish_many([InvalidationEvent(content_type_id, pk, old_uuid, new_uuid)])
+
+    def publish_clear(self):
+        """
+        Publishes a single event telling every subscriber to drop everything.
+        """
+        self.publish_many([None])
+
+    def publish_many(self, events):
+        """
+        Publishes ``events`` once the current transaction commits (immediately
+        outside of one). This process's subscribers get them right away. More than
+        ``max_backlog`` events are replaced by a single clear-all event, which is
+        what pollers would fall back to anyway.
+        """
+        events = list(events)
+        if not events or not self.is_enabled:
+            return
+        if len(events) > self.max_backlog:
+            events = [None]
+        transaction.on_commit(lambda: self._publish_now(events))
+
+    def _publish_now(self, events):
+        backend = self.backend
+        ttl = getattr(settings, 'CACHE_INVALIDATION_EVENT_TTL', 300)
+        backend.add(self.seq_key, 0, None)
+        # Reserve one seq per event in a single round trip, then write them all.
+        last_seq = backend.incr(self.seq_key, len(events))
+        first_seq = last_seq - len(events) + 1
+        backend.set_many({
+            # A clear-all event is stored as an empty tuple, since ``None`` reads as missing.
+            self.event_key % seq: tuple(event) if event is not None else ()
+            for seq, event in enumerate(events, first_seq)
+        }, ttl)
+        self.deliver(events)
+
+    def poll(self, force=False):
+        """
+        Delivers events published by other processes since the last poll. The first
+        poll of a process only records where the sequence stands.
+        """
+        if not self.is_enabled:
+            return
+
+        now = time.monotonic()
+        if not force and now - self._last_poll < getattr(settings, 'CACHE_INVALIDATION_POLL_INTERVAL', 1.0):
+            return
+
+        if not self._lock.acquire(False):
+            return  # Another thread is already polling.
+        try:
+            self._last_poll = now
+            self._poll()
+        finally:
+            self._lock.release()
+
+    def _poll(self):
+        backend = self.backend
+        current = backend.get(self.seq_key) or 0
+        if self._last_seq is None or current < self._last_seq:
+            # First poll, or the backend was flushed.
+            self._last_seq = current
+            return
+        if current == self._last_seq:
+            return
+
+        if current - self._last_seq > self.max_backlog:
+            self._last_seq = current
+            self.deliver([None])
+            return
+
+        seqs = range(self._last_seq + 1, current + 1)
+        found = backend.get_many([self.event_key % seq for seq in seqs])
+
+        events = []
+        for seq in seqs:
+            event = found.get(self.event_key % seq)
+            if event is None:
+                if self._missing_seq != seq:
+                    # Possibly published but not written yet; look again next poll.
+                    self._missing_seq = seq
+                    break
+                # Still missing: the event expired before it was read.
+                events.append(None)
+            else:
+                events.append(InvalidationEvent(*event) if event else None)
+            self._last_seq = seq
+
+        self.deliver(events)
+
+    def deliver(self, events):
+        for event in events:
+            for callback in list(self._subscribers):
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("Invalidation subscriber %r failed on %r", callback, event)
+
+
+invalidation_bus = InvalidationBus()
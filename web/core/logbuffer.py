@@ -0,0 +1,179 @@
+from __future__ import unicode_literals
+import atexit
+import logging
+import os
+import threading
+from collections import deque, namedtuple
+
+# Django
+from django.conf import settings
+from django.db import close_old_connections, models, transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+# Local Apps
+from core.models import LOG_ENTRY_DESC_MAX_LENGTH, LOG_STORAGE_TABLE, LogEntry, format_log_entry
+from core.utils import ContentTypeRepo
+
+
+logger = logging.getLogger('core.logbuffer')
+
+
+PendingLogEntry = namedtuple('PendingLogEntry', ['model', 'pk', 'log', 'desc', 'created_at', 'attempts'])
+
+
+def write_log_entries(pending):
+    """
+    Writes a batch of ``PendingLogEntry`` in as few statements as possible: one
+    ``bulk_create`` for every ``LOG_STORAGE_TABLE`` entry, and one ``UPDATE`` per
+    ``LOG_STORAGE_COLUMN`` model, appending to each row's ``log`` with ``Concat``
+    (see ``BaseModelMixin.get_log_append_values()``).
+    """
+    rows = []
+    texts_by_model = {}
+    for entry in pending:
+        if entry.model.log_storage == LOG_STORAGE_TABLE:
+            rows.append(LogEntry(content_type=ContentTypeRepo().get_for_model(entry.model), object_id=entry.pk,
+                                 desc=entry.desc or '', text=entry.log, created_at=entry.created_at))
+        else:
+            texts = texts_by_model.setdefault(entry.model, {})
+            texts[entry.pk] = texts.get(entry.pk, '') + format_log_entry(entry.log, entry.desc, entry.created_at)
+
+    if rows:
+        LogEntry.objects.bulk_create(rows)
+
+    for model, texts in texts_by_model.items():
+        appended = Case(*[When(pk=pk, then=Value(text)) for pk, text in texts.items()],
+                        default=Value(''), output_field=models.TextField())
+        model.get_log_queryset().filter(pk__in=list(texts)).update(**model.get_log_append_values(appended))
+
+
+class LogBuffer(object):
+    """
+    In-process queue of log entries, written in batches by a background thread
+    every ``flush_interval`` seconds or as soon as ``flush_size`` entries are waiting.
+    Whatever is left is flushed at interpreter exit, retries included, so a graceful
+    worker shutdown only loses entries that failed ``max_attempts`` times.
+    """
+
+    def __init__(self, flush_size=None, flush_interval=None, max_attempts=None, max_dead_letters=None):
+        self.flush_size = flush_size or getattr(settings, 'LOG_BUFFER_FLUSH_SIZE', 500)
+        self.flush_interval = flush_interval or getattr(settings, 'LOG_BUFFER_FLUSH_INTERVAL', 1.0)
+        self.max_attempts = max_attempts or getattr(settings, 'LOG_BUFFER_MAX_ATTEMPTS', 3)
+        self._items = []
+        # The most recent entries given up on, each also logged when dropped.
+        self.dead_letters = deque(maxlen=max_dead_letters or getattr(settings, 'LOG_BUFFER_MAX_DEAD_LETTERS', 100))
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, entry):
+        self.ensure_worker()
+        with self._lock:
+            self._items.append(entry)
+            is_full = len(self._items) >= self.flush_size
+        if is_full:
+            self._wakeup.set()
+
+    def ensure_worker(self):
+        """
+        Starts the worker thread for this process. Checked by pid, so forked
+        workers each get their own.
+        """
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._items = []
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='core-log-buffer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        """
+        Writes everything queued so far, ``flush_size`` entries per batch. A failed
+        batch is retried entry by entry, so the good entries are still written; each
+        failing entry is queued again for the next flush, up to ``max_attempts``
+        times, after which it is logged and moved to ``dead_letters``.
+        """
+        with self._lock:
+            items, self._items = self._items, []
+
+        written = 0
+        for start in range(0, len(items), self.flush_size):
+            batch = items[start:start + self.flush_size]
+            try:
+                with transaction.atomic():
+                    write_log_entries(batch)
+            except Exception:
+                logger.exception("Failed writing %d buffered log entries; retrying one by one.", len(batch))
+                written += self.flush_one_by_one(batch)
+            else:
+                written += len(batch)
+        return written
+
+    def flush_one_by_one(self, batch):
+        written = 0
+        retries = []
+        for entry in batch:
+            try:
+                with transaction.atomic():
+                    write_log_entries([entry])
+            except Exception:
+                entry = entry._replace(attempts=entry.attempts + 1)
+                if entry.attempts < self.max_attempts:
+                    retries.append(entry)
+                    continue
+                logger.exception("Dropping log entry for %s %s after %d failed attempts: %r",
+                                 entry.model.__name__, entry.pk, entry.attempts, entry)
+                with self._lock:
+                    self.dead_letters.append(entry)
+            else:
+                written += 1
+
+        if retries:
+            with self._lock:
+                self._items[:0] = retries
+        return written
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval * 2)
+
+        # Failed entries are queued again, each until it runs out of attempts, so
+        # this ends after at most ``max_attempts`` rounds.
+        while self._items:
+            self.flush()
+
+
+log_buffer = LogBuffer()
+
+
+def buffer_log_entry(obj, log, desc=None):
+    """
+    Queues a log entry for ``obj``. It is handed to ``log_buffer`` only once the
+    current transaction commits (immediately outside of one), so logs of rolled
+    back work are never written.
+    """
+    if desc and obj.log_storage == LOG_STORAGE_TABLE:
+        desc = desc[:LOG_ENTRY_DESC_MAX_LENGTH]
+    entry = PendingLogEntry(type(obj), obj.pk, log, desc, timezone.now(), 0)
+    transaction.on_commit(lambda: log_buffer.add(entry))
+    return entry
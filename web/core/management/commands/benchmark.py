@@ -0,0 +1,40 @@
+from __future__ import unicode_literals
+import json
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Local Apps
+from core.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Runs the targets registered in ``core.benchmarks``, or only the ones named."
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help="Targets to run. All of them by default.")
+        parser.add_argument('--number', type=int, default=100, help="Calls timed per round.")
+        parser.add_argument('--json', action='store_true', default=False, help="Print the results as JSON.")
+        parser.add_argument('--list', action='store_true', default=False, help="List the targets and exit.")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name in BENCHMARKS:
+                self.stdout.write(name)
+            return
+
+        names = options['targets'] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError("Unknown benchmark(s): %s. Use --list to see them." % (', '.join(unknown),))
+
+        results = {}
+        for name in names:
+            results[name] = BENCHMARKS[name](options['number'])
+            if not options['json']:
+                self.stdout.write(name)
+                for label, stats in results[name].items():
+                    self.stdout.write('  %-32s %s' % (label, '  '.join('%s %s' % (key, value,) for key, value in stats.items()),))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,84 @@
+from __future__ import unicode_literals
+import datetime
+import re
+
+# Django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+# Local Apps
+from core.models import LOG_DELIMITER, LOG_ENTRY_DESC_MAX_LENGTH, LOG_STORAGE_TABLE, LOG_TIMESTAMP_FORMAT, LogEntry
+
+
+LOG_ENTRY_RE = re.compile(
+    r'%(delimiter)s\n(?P<timestamp>[^\n]*)\n(?:\*\*(?P<desc>[^\n]*)\*\*\n)?(?P<text>.*?)\n%(delimiter)s\n' % {
+        'delimiter': re.escape(LOG_DELIMITER),
+    },
+    re.DOTALL,
+)
+
+
+def parse_log(blob):
+    """
+    Splits a ``log`` text blob written by ``append_to_log()`` back into
+    ``(created_at, desc, text)`` tuples. Anything that doesn't parse is kept
+    as a single entry, so no text is ever dropped.
+    """
+    entries = []
+    position = 0
+    for match in LOG_ENTRY_RE.finditer(blob):
+        if blob[position:match.start()].strip():
+            entries.append((None, '', blob[position:match.start()].strip()))
+        try:
+            created_at = datetime.datetime.strptime(match.group('timestamp'), LOG_TIMESTAMP_FORMAT)
+            created_at = timezone.make_aware(created_at, timezone.utc)
+        except ValueError:
+            created_at = None
+        entries.append((created_at, match.group('desc') or '', match.group('text')))
+        position = match.end()
+
+    if blob[position:].strip():
+        entries.append((None, '', blob[position:].strip()))
+    return entries
+
+
+class Command(BaseCommand):
+    help = "Moves existing ``log`` text blobs of a model using ``LOG_STORAGE_TABLE`` into ``LogEntry`` rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="The model to compact, as ``app_label.ModelName``.")
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if getattr(model, 'log_storage', None) != LOG_STORAGE_TABLE:
+            raise CommandError("`%s` must set `log_storage = LOG_STORAGE_TABLE` before its logs are compacted." % (options['model'],))
+
+        content_type = model.get_content_type()
+        queryset = model._default_manager.exclude(log__isnull=True).exclude(log='').order_by('pk')
+        pks = list(queryset.values_list('pk', flat=True))
+
+        compacted = 0
+        for start in range(0, len(pks), options['batch_size']):
+            batch = pks[start:start + options['batch_size']]
+            with transaction.atomic():
+                rows = model._default_manager.select_for_update().filter(pk__in=batch).values_list('pk', 'log')
+                entries = []
+                for pk, blob in rows:
+                    for created_at, desc, text in parse_log(blob or ''):
+                        entry = LogEntry(content_type=content_type, object_id=pk, desc=desc[:LOG_ENTRY_DESC_MAX_LENGTH], text=text)
+                        if created_at:
+                            entry.created_at = created_at
+                        entries.append(entry)
+
+                LogEntry.objects.bulk_create(entries)
+                model._default_manager.filter(pk__in=batch).update(log='')
+            compacted += len(batch)
+
+        self.stdout.write("Compacted the logs of %d %s record(s)." % (compacted, model._meta.verbose_name,))
@@ -1,16 +1,58 @@
 from __future__ import unicode_literals
 
 # Python
+import logging
+import random
 import traceback
 import time
+import uuid
+from datetime import tzinfo
+
+# 3rd Party
+import pytz
 
 # Django
 from django.conf import settings
-from django.db import connection
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.db import connection, connections
 from django.utils import timezone
 
 # Local Apps
-from core.utils import colored_resp_time, cprint
+from core.invalidation import invalidation_bus
+from core.profiling import CursorProfileHook, QueryProfile, route_latency, worst_query_requests
+from core.utils import add_request_phase_time, colored_resp_time, cprint, end_request_cache, \
+    end_request_phases, start_request_cache, start_request_phases
+
+
+class RequestCache(object):
+    """
+    Gives each request its own cache for ``@memoize(scope='request')``, dropped as
+    soon as the response is ready. Lives in a contextvar (a thread-local before
+    Python 3.7, see ``core.utils.ThreadLocalVar``), so it is safe under threaded
+    WSGI servers.
+    """
+
+    def process_request(self, request):
+        request._request_cache_token = start_request_cache()
+
+    def process_response(self, request, response):
+        token = getattr(request, '_request_cache_token', None)
+        if token is not None:
+            end_request_cache(token)
+            del request._request_cache_token
+        return response
+
+
+class PollInvalidations(object):
+    """
+    Picks up ``cache_uuid`` rotations published by other workers (see
+    ``core.invalidation``) before the request touches any in-process cache.
+    Throttled, so most requests pay nothing but a clock read.
+    """
+
+    def process_request(self, request):
+        invalidation_bus.poll()
 
 
 class LogStuff(object):
@@ -34,50 +76,327 @@ class LogStuff(object):
         # if 'print_queries' not in request.GET.keys():
         #     return response
 
-        try:
-            import sqlparse
-        except ImportError:
-            sqlparse = None
-
         if len(connection.queries) > 0 and settings.DEBUG:
-            total_time = 0.0
-            for query in connection.queries:
-                total_time = total_time + float(query['time'])
-                continue
-                print('')
-                if sqlparse:
-                    print(sqlparse.format(query['sql'], reindent=True))
-                    print('\033[93m' + query['time'] + '\033[0m')
-                else:
-                    print(query['sql'])
-                print('')
+            total_time = sum(float(query['time']) for query in connection.queries)
             print("\033[1;32m[TOTAL TIME: %s seconds]\033[0m" % total_time)
             print("  Ran %d queries" % len(connection.queries))
         return response
 
 
+class ProfileQueries(object):
+    """
+    Counts and times every query of a request, without needing ``DEBUG``, and flags
+    N+1 patterns: any SQL fingerprint run ``SQL_PROFILER_DUPLICATE_THRESHOLD`` times
+    or more. Findings go out as ``X-Query-*`` response headers (if
+    ``SQL_PROFILER_HEADERS``), a warning on the ``core.middleware.queries`` logger,
+    and ``core.profiling.worst_query_requests``.
+
+    Queries are hooked with ``connection.execute_wrapper()`` where Django provides it,
+    and with ``core.profiling.CursorProfileHook`` otherwise.
+    """
+    logger = logging.getLogger('core.middleware.queries')
+
+    def process_request(self, request):
+        sample_rate = getattr(settings, 'SQL_PROFILER_SAMPLE_RATE', 1.0)
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return
+
+        profile = request._query_profile = QueryProfile()
+        if hasattr(connection, 'execute_wrapper'):
+            request._query_profile_wrappers = [conn.execute_wrapper(profile) for conn in connections.all()]
+        else:
+            request._query_profile_wrappers = [CursorProfileHook(conn, profile) for conn in connections.all()]
+        for wrapper in request._query_profile_wrappers:
+            wrapper.__enter__()
+
+    def process_response(self, request, response):
+        profile = getattr(request, '_query_profile', None)
+        if profile is None:
+            return response
+
+        for wrapper in reversed(getattr(request, '_query_profile_wrappers', [])):
+            wrapper.__exit__(None, None, None)
+
+        self.report(request, response, profile)
+        return response
+
+    def report(self, request, response, profile):
+        add_request_phase_time('db', profile.total_ms)
+
+        threshold = getattr(settings, 'SQL_PROFILER_DUPLICATE_THRESHOLD', 5)
+        duplicates = profile.duplicates(threshold)
+
+        if getattr(settings, 'SQL_PROFILER_HEADERS', False):
+            response['X-Query-Count'] = str(profile.count)
+            response['X-Query-Time-Ms'] = '%.3f' % (profile.total_ms,)
+            response['X-Query-Duplicates'] = str(len(duplicates))
+
+        path = request.META.get('PATH_INFO', '')
+        worst_query_requests.consider(profile.total_ms, {
+            'path': path,
+            'method': request.method,
+            'count': profile.count,
+            'total_ms': round(profile.total_ms, 3),
+            'duplicates': [(stats['count'], fingerprint,) for fingerprint, stats in duplicates],
+        })
+
+        slow_ms = getattr(settings, 'SQL_PROFILER_SLOW_MS', 500)
+        if duplicates or profile.total_ms >= slow_ms:
+            self.logger.warning(
+                '%s %s ran %d queries in %.3f ms; %d repeated fingerprint(s)%s',
+                request.method, path, profile.count, profile.total_ms, len(duplicates),
+                ''.join('\n  x%d %s' % (stats['count'], fingerprint,) for fingerprint, stats in duplicates),
+            )
+
+
+def get_timezone_cookie_name():
+    return getattr(settings, 'TIMEZONE_COOKIE_NAME', 'tz')
+
+
+def get_timezone_cookie_salt(request):
+    # Bound to the session key, which changes on login and logout.
+    return request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+
+
+def get_timezone_version_key(user_id):
+    return 'core:timezone-version:%s' % (user_id,)
+
+
+def get_timezone_version_cache():
+    """
+    Returns the cache holding timezone versions, or ``None`` when
+    ``TIMEZONE_VERSION_CACHE_ALIAS`` isn't set. It must be shared by every worker
+    process: a per-process cache would keep accepting cookies voided elsewhere.
+    """
+    alias = getattr(settings, 'TIMEZONE_VERSION_CACHE_ALIAS', None)
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def get_timezone_version(user_id):
+    """
+    Returns the version of ``user_id``'s timezone, part of the cookie value, so that
+    a change made elsewhere (another session, the admin) voids cookies already set.
+    A single cache read; no user is loaded.
+
+    Returns ``None`` when the version is unknown (never set, evicted, or no version
+    cache configured), in which case no cookie can be trusted.
+    """
+    if user_id is None:
+        return ''
+    cache = get_timezone_version_cache()
+    if cache is None:
+        return None
+    return cache.get(get_timezone_version_key(user_id))
+
+
+def ensure_timezone_version(user_id):
+    """
+    Like ``get_timezone_version()``, but gives ``user_id`` a new version when it has
+    none, so the timezone just resolved can be cached in a cookie. ``None`` without
+    a version cache.
+    """
+    version = get_timezone_version(user_id)
+    cache = get_timezone_version_cache()
+    if version is None and cache is not None:
+        key = get_timezone_version_key(user_id)
+        # ``add()``, so concurrent requests of the same user agree on one version.
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def forget_timezone(request, user=None):
+    """
+    Drops the timezone cached for ``request``'s session, e.g. after the user
+    changed theirs. The next request resolves it from the user again.
+
+    With ``user``, the timezone cached by every other session of that user is
+    voided too.
+    """
+    request._forget_timezone = True
+    cache = get_timezone_version_cache()
+    if user is not None and user.pk is not None and cache is not None:
+        cache.set(get_timezone_version_key(user.pk), uuid.uuid4().hex, None)
+
+
+class LazyTimezone(tzinfo):
+    """
+    ``tzinfo`` standing in for the timezone of the requesting user. The zone is
+    only resolved, by ``resolve``, the first time a datetime is localized.
+    """
+
+    def __init__(self, resolve):
+        self._resolve = resolve
+        self._tz = None
+
+    def resolve(self):
+        if self._tz is None:
+            self._tz = self._resolve()
+        return self._tz
+
+    @property
+    def is_resolved(self):
+        return self._tz is not None
+
+    def __getattr__(self, name):
+        # ``zone``, ``localize()``, ``normalize()`` and pytz internals.
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def naive(self, dt):
+        # pytz localizes whatever it's given, and datetimes attached to this proxy
+        # are aware.
+        return dt.replace(tzinfo=None) if dt is not None else None
+
+    def utcoffset(self, dt):
+        return self.resolve().utcoffset(self.naive(dt))
+
+    def dst(self, dt):
+        return self.resolve().dst(self.naive(dt))
+
+    def tzname(self, dt):
+        return self.resolve().tzname(self.naive(dt))
+
+    def fromutc(self, dt):
+        tz = self.resolve()
+        return tz.fromutc(dt.replace(tzinfo=tz))
+
+    def __repr__(self):
+        return '<LazyTimezone: %s>' % (self._tz if self._tz is not None else 'unresolved',)
+
+
 class LocalizeTimezone(object):
+    """
+    Activates the requesting user's timezone, lazily: the zone is only looked up
+    when a datetime is first localized, so requests that never render one don't
+    load the user at all.
+
+    Once looked up, the zone is cached in a cookie signed against the session key,
+    so later requests of the same session don't load the user either. The cookie
+    also carries the user's timezone version (see ``forget_timezone()``), checked
+    against ``TIMEZONE_VERSION_CACHE_ALIAS`` on read; without that cache, or when
+    the version was evicted from it, the cookie is ignored. Requests without a
+    session cookie are anonymous and get UTC without any lookup.
+    """
 
     def process_request(self, request):
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            timezone.deactivate()
+            return
+
+        request.timezone = LazyTimezone(lambda: self.resolve_timezone(request))
+        timezone.activate(request.timezone)
+
+    def get_timezone_version(self, request):
+        return get_timezone_version(request.session.get(SESSION_KEY))
+
+    def resolve_timezone(self, request):
+        value = request.get_signed_cookie(get_timezone_cookie_name(), default=None,
+                                          salt=get_timezone_cookie_salt(request))
+        if value:
+            version, _, zone = value.partition('|')
+            current_version = self.get_timezone_version(request)
+            if current_version is not None and version == current_version:
+                try:
+                    return pytz.timezone(zone)
+                except pytz.UnknownTimeZoneError:
+                    pass
+
         if request.user.is_authenticated():
-            timezone.activate(request.user.get_timezone())
+            tz = request.user.get_timezone()
         else:
-            timezone.deactivate()
+            tz = pytz.UTC
+        request._should_cache_timezone = True
+        return tz
 
     def process_response(self, request, response):
         timezone.deactivate()
+
+        cookie_name = get_timezone_cookie_name()
+        if getattr(request, '_forget_timezone', False):
+            response.delete_cookie(cookie_name)
+        elif getattr(request, '_should_cache_timezone', False):
+            version = ensure_timezone_version(request.session.get(SESSION_KEY))
+            if version is None:
+                return response
+            response.set_signed_cookie(
+                cookie_name,
+                '%s|%s' % (version, request.timezone.zone,),
+                salt=get_timezone_cookie_salt(request),
+                max_age=getattr(settings, 'TIMEZONE_COOKIE_MAX_AGE', 60 * 60 * 24 * 30),
+                secure=settings.SESSION_COOKIE_SECURE or None,
+                httponly=True,
+            )
         return response
 
 
 class TimeRequests(object):
+    """
+    Times each request on a monotonic clock, split into phases:
+
+        middleware    request middleware and URL resolving, plus the response
+                      middleware of template responses
+        view          the view itself (for non-template responses this also covers
+                      the response middleware listed after this one)
+        render        rendering of a ``TemplateResponse``
+        db            query time, when ``ProfileQueries`` is installed
+        http          outbound calls made through ``core.utils.requests``
+
+    Phases go out as a ``Server-Timing`` header and totals feed the per-URL-name
+    histograms in ``core.profiling.route_latency`` (see ``core.views.timings``).
+    Should be listed first in ``MIDDLEWARE_CLASSES``.
+    """
 
     def process_request(self, request):
-        request._start_time = time.time()
+        request._start_time = time.perf_counter()
+        request._request_phases_token = start_request_phases()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_start_time = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request._view_end_time = time.perf_counter()
+
+        def mark_rendered(response):
+            request._render_end_time = time.perf_counter()
+        response.add_post_render_callback(mark_rendered)
+        return response
 
     def process_response(self, request, response):
-        if hasattr(request, '_start_time'):
-            resp_time_ms = (time.time() - request._start_time) * 1000
+        if not hasattr(request, '_start_time'):
+            return response
+
+        end = time.perf_counter()
+        phases = end_request_phases(request._request_phases_token)
+        timings = self.get_phase_timings(request, end)
+        timings.update(phases)
+
+        response['Server-Timing'] = ', '.join(
+            '%s;dur=%.3f' % (phase, ms,) for phase, ms in sorted(timings.items())
+        )
 
-            if settings.DEBUG:
-                print('Responded in %s ms' % (colored_resp_time(resp_time_ms),))
+        resolver_match = getattr(request, 'resolver_match', None)
+        route_latency.record(resolver_match.view_name if resolver_match else '<unresolved>', timings['total'])
+
+        if settings.DEBUG:
+            print('Responded in %s ms' % (colored_resp_time(timings['total']),))
         return response
+
+    def get_phase_timings(self, request, end):
+        start = request._start_time
+        timings = {'total': (end - start) * 1000}
+
+        view_start = getattr(request, '_view_start_time', None)
+        if view_start is None:
+            timings['middleware'] = timings['total']
+            return timings
+
+        view_end = getattr(request, '_view_end_time', end)
+        render_end = getattr(request, '_render_end_time', view_end)
+        timings['view'] = (view_end - view_start) * 1000
+        timings['render'] = (render_end - view_end) * 1000
+        timings['middleware'] = timings['total'] - timings['view'] - timings['render']
+        return timings
@@ -1,11 +1,13 @@
-import pytz
 import uuid
 
 # Django
 from django.conf import settings
-from django.contrib.contenttypes.models import ContentType
 from django.core.urlresolvers import reverse
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.utils import timezone
 
 # 3rd Party
@@ -13,14 +15,30 @@ from django_countries.fields import CountryField
 from timezone_field import TimeZoneField
 
 # Local
-from core.utils import cprint, site_url
+from core.cache import serialized_object_cache
+from core.invalidation import InvalidationEvent, invalidation_bus
+from core.utils import ContentTypeRepo, cprint, import_lazily, site_url
+
+
+_timezone_choices = None
 
 
-TIMEZONE_CHOICES = [(pytz.timezone(tz), tz) for tz in pytz.common_timezones]
+def get_timezone_choices():
+    """
+    Returns ``((zone name, label), ...)`` for ``pytz.common_timezones``, built on
+    first use and shared for the life of the process. Strings only, so no pytz
+    zone gets loaded to list them, and pytz is only imported here.
+    """
+    global _timezone_choices
+    if _timezone_choices is None:
+        _timezone_choices = tuple((tz, tz) for tz in import_lazily('pytz').common_timezones)
+    return _timezone_choices
 
 
 class TimezoneMixin(models.Model):
-    timezone = TimeZoneField(choices=TIMEZONE_CHOICES, blank=True, null=True)
+    # ``TimeZoneField`` defaults to the common timezones; passing them again would
+    # only build a second list of pytz zones at import time.
+    timezone = TimeZoneField(blank=True, null=True)
 
     class Meta:
         abstract = True
@@ -29,7 +47,7 @@ class TimezoneMixin(models.Model):
         if self.timezone:
             return self.timezone
         else:
-            return pytz.UTC
+            return timezone.utc
 
     def get_timezone_string(self):
         tz = self.get_timezone()
@@ -39,16 +57,8 @@ class TimezoneMixin(models.Model):
             return ''
 
     def now(self):
-        # Get now
-        now = timezone.now()
-
-        # Flip it back to naive, which applies the appropriate offset
-        naive_now = timezone.make_naive(now, self.get_timezone())
-
-        # Re-apply the timezone which does not apply any offset
-        aware_now = timezone.make_aware(naive_now, self.get_timezone())
-
-        return aware_now
+        # A single UTC -> local conversion, see ``core.tzconvert`` for many values.
+        return timezone.localtime(timezone.now(), self.get_timezone())
 
 
 class CountryMixin(models.Model):
@@ -64,8 +74,38 @@ class GeoMixin(TimezoneMixin, CountryMixin):
         abstract = True
 
 
+LOG_STORAGE_COLUMN = 'column'
+LOG_STORAGE_TABLE = 'table'
+
+# ``LogEntry.desc`` length; longer descriptions are cut when stored there.
+LOG_ENTRY_DESC_MAX_LENGTH = 255
+
+LOG_DELIMITER = '##################'
+LOG_TIMESTAMP_FORMAT = '%b %d, %Y, %I:%M:%S %p UTC'
+
+
+def format_log_entry(log, desc=None, timestamp=None):
+    """
+    Formats a log, optional name, and timestamp into the block of text used by
+    ``append_to_log()``.
+    """
+    timestamp = timestamp or timezone.now()
+    pre_log = '%s\n' % (LOG_DELIMITER,)
+    pre_log += '%s\n' % timestamp.strftime(LOG_TIMESTAMP_FORMAT)
+    if desc:
+        pre_log += '**%s**\n' % desc
+
+    post_log = '\n%s\n' % (LOG_DELIMITER,)
+
+    return '%s%s%s' % (pre_log, log, post_log,)
+
+
 class BaseModelMixin(object):
 
+    # Where ``append_to_log()`` writes. ``LOG_STORAGE_COLUMN`` appends to a ``log`` text
+    # field on the model; ``LOG_STORAGE_TABLE`` adds one ``LogEntry`` row per append.
+    log_storage = LOG_STORAGE_COLUMN
+
     def __str__(self):
         try:
             return self.as_str()
@@ -114,7 +154,7 @@ class BaseModelMixin(object):
 
     @classmethod
     def get_content_type(cls):
-        return ContentType.objects.get_for_model(cls)
+        return ContentTypeRepo().get_for_model(cls)
 
     @classmethod
     def field_names(cls):
@@ -123,12 +163,150 @@ class BaseModelMixin(object):
         """
         return [field.name for field in cls._meta.fields]
 
-    def reload(self):
+    @classmethod
+    def get_serialization_excludes(cls):
+        """
+        Returns the list of field names ``serialize()`` should skip. Inheriting
+        classes may either set ``serialization_excludes`` or extend this classmethod,
+        which is also read off the model class (see ``core.streaming``).
+        """
+        return list(getattr(cls, 'serialization_excludes', []))
+
+    def get_serialization_field_names(self):
+        excludes = set(self.get_serialization_excludes())
+        return [field_name for field_name in self.field_names() if field_name not in excludes]
+
+    def serialize(self, use_cache=True):
+        """
+        Returns a dictionary representation of this record. When the model inherits
+        from ``CacheUUIDModel`` the result is cached until ``cache_uuid`` rotates.
+        """
+        if use_cache:
+            return serialized_object_cache.get(self)
+        return self._serialize()
+
+    def _serialize(self):
+        """
+        Does the actual work behind ``serialize()``, bypassing the cache.
+        """
+        return dict(
+            (field_name, self.get_field_value(field_name),)
+            for field_name in self.get_serialization_field_names()
+        )
+
+    @classmethod
+    def serialize_many(cls, objs, should_hydrate=True):
+        """
+        Serializes an iterable of records (or a queryset) with one bulk cache lookup.
+        Unless ``should_hydrate`` is False, the relations needed by cache misses are
+        fetched with ``hydrate_relations()`` instead of one query per record.
+        """
+        prepare_misses = cls.hydrate_serialization_relations if should_hydrate else None
+        return serialized_object_cache.get_many(objs, prepare_misses=prepare_misses)
+
+    @classmethod
+    def hydrate_serialization_relations(cls, objs):
+        """
+        Hydrates only the relations ``_serialize()`` will actually touch, which are
+        those whose model defines ``add_to_serialization_as_relation``.
+        """
+        objs = list(objs)
+        if not objs:
+            return objs
+
+        field_names = [
+            field_name for field_name in objs[0].get_serialization_field_names()
+            if hasattr(cls._meta.get_field(field_name).related_model, 'add_to_serialization_as_relation')
+        ]
+        return cls.hydrate_relations(objs, field_names)
+
+    @classmethod
+    def hydrate_relations(cls, objs, field_names=None):
+        """
+        Populates the related object cache of every record in ``objs`` for the given
+        ForeignKey/OneToOne ``field_names`` (defaults to all of them), using one
+        ``in_bulk`` query per related model. Afterwards, ``get_field_value()`` - with
+        or without ``full=True`` - no longer queries for those relations.
+
+        Related objects are shared between records pointing at the same row.
+        """
+        objs = list(objs)
+        if field_names is None:
+            field_names = [field.name for field in cls._meta.fields if field.many_to_one or field.one_to_one]
+
+        fields = []
+        ids_by_model = {}
+        for field_name in field_names:
+            field = cls._meta.get_field(field_name)
+            # ``in_bulk`` is keyed on pk, so relations using ``to_field`` are left alone.
+            if not (field.many_to_one or field.one_to_one) or not field.target_field.primary_key:
+                continue
+
+            fields.append(field)
+            ids = ids_by_model.setdefault(field.related_model, set())
+            for obj in objs:
+                _id = getattr(obj, field.attname)
+                if _id is not None and not hasattr(obj, field.get_cache_name()):
+                    ids.add(_id)
+
+        related_by_model = dict(
+            (model, model._default_manager.in_bulk(list(ids)),)
+            for model, ids in ids_by_model.items() if ids
+        )
+
+        for field in fields:
+            related = related_by_model.get(field.related_model, {})
+            for obj in objs:
+                _id = getattr(obj, field.attname)
+                if _id in related and not hasattr(obj, field.get_cache_name()):
+                    setattr(obj, field.get_cache_name(), related[_id])
+
+        return objs
+
+    def reload(self, fields=None, for_update=False):
         """
         In place DB update of the record.
+
+        Only ``fields`` (defaults to every concrete field) are fetched, with ``values()``,
+        and set on this instance; no new instance is built. Caches that may have gone
+        stale are dropped and the rest kept: memoized values only go if a value actually
+        changed, a cached relation only if its key changed, and prefetched relations stay.
+        The ``tracker``, if any, treats the reloaded values as saved.
+
+        Arguments:
+        fields        {list}    OPTIONAL. Names (or attnames) of the fields to refresh.
+        for_update    {bool}    OPTIONAL. Lock the row with ``SELECT ... FOR UPDATE``.
+                                Must be called inside a transaction.
         """
-        new_self = self.__class__.objects.get(pk=self.pk)
-        self.__dict__.update(new_self.__dict__)
+        concrete_fields = self._meta.concrete_fields
+        if fields is not None:
+            fields = set(fields)
+            concrete_fields = [field for field in concrete_fields if field.name in fields or field.attname in fields]
+
+        queryset = type(self)._default_manager.filter(pk=self.pk)
+        if for_update:
+            queryset = queryset.select_for_update()
+        values = queryset.values(*[field.attname for field in concrete_fields]).get()
+
+        has_changed = False
+        for field in concrete_fields:
+            value = values[field.attname]
+            if field.attname not in self.__dict__ or self.__dict__[field.attname] != value:
+                has_changed = True
+                if field.is_relation:
+                    self.__dict__.pop(field.get_cache_name(), None)
+            setattr(self, field.attname, value)
+
+        if has_changed:
+            self.__dict__.pop('_memoize_cache', None)
+
+        if hasattr(self, 'tracker'):
+            if fields is None:
+                self.tracker.set_saved_fields()
+            else:
+                self.tracker.set_saved_fields(fields=[
+                    field.attname for field in concrete_fields if field.attname in self.tracker.fields
+                ])
         return self
 
     def get_field_value(self, field_name, full=False):
@@ -172,46 +350,244 @@ class BaseModelMixin(object):
             return getattr(self, field_name, None)
 
     def append_to_log(self, log, should_save=True, desc=None, should_use_transaction=True,
-                      should_reload=True):
+                      should_reload=False, should_buffer=None):
         """
         The wrapper function around ``_append_to_log()``. The distinction exists to help
         sanely enforce the ``should_use_transaction`` flag.
+
+        Where the entry goes depends on ``log_storage``; see ``_append_to_log()``.
+
+        When ``should_buffer`` (defaults to the ``LOG_BUFFER_ENABLED`` setting) and
+        ``should_save`` are set, nothing is written during the request: the entry is
+        queued at commit and written in a batch by ``core.logbuffer.log_buffer``.
+        The in-memory ``log`` doesn't include it until reloaded.
         """
+        if should_buffer is None:
+            should_buffer = getattr(settings, 'LOG_BUFFER_ENABLED', False)
+
+        if should_buffer and should_save:
+            self.check_log_writable(should_save)
+            # Imported here since ``core.logbuffer`` depends on this module.
+            from core.logbuffer import buffer_log_entry
+            # ``self.log`` is left as is: a later ``save()`` would otherwise write the
+            # entry once, and the buffer a second time.
+            buffer_log_entry(self, log, desc)
+            return self
+
         if should_use_transaction:
             with transaction.atomic():
                 return self._append_to_log(log, should_save, desc, should_reload)
         else:
             return self._append_to_log(log, should_save, desc, should_reload)
 
-    def _append_to_log(self, log, should_save=True, desc=None, should_reload=True):
+    def _append_to_log(self, log, should_save=True, desc=None, should_reload=False):
         """
         Does the actual work of formatting a log, optional name, and timestamp into
-        a block of text that gets appended to the ``self.log``.
+        a block of text that gets appended to the log of this record.
+
+        With ``LOG_STORAGE_TABLE``, the entry becomes its own ``LogEntry`` row, whatever
+        ``should_save`` and ``should_reload`` say.
+
+        With ``LOG_STORAGE_COLUMN`` and ``should_save``, a single UPDATE appends to the
+        ``log`` column with an SQL-side ``Concat`` (and bumps ``updated_at``, and maybe
+        ``cache_uuid``, see ``get_log_append_values()``), so the existing text is never
+        read back or rewritten. The entry is appended to the in-memory value too; only
+        with ``should_reload`` is ``self.log`` fetched again, which costs as much as the
+        log is long. Without ``should_save`` the entry is only appended in memory, for a
+        later ``save()``, after reloading and locking the row if ``should_reload``.
         """
+        self.check_log_writable(should_save)
+        entry = format_log_entry(log, desc)
+
+        if self.log_storage == LOG_STORAGE_TABLE:
+            LogEntry.objects.create(content_type=self.get_content_type(), object_id=self.pk,
+                                    desc=(desc or '')[:LOG_ENTRY_DESC_MAX_LENGTH], text=log)
+            return self
+
         assert 'log' in self.field_names(), "Cannot call ``append_to_log()`` on \
             model without a field named ``log``."
 
-        if self.log is None:
-            self.log = ''
-            self.save()
+        if should_save:
+            values = self.get_log_append_values(Value(entry))
+            type(self).get_log_queryset().filter(pk=self.pk).update(**values)
+            for field_name in ('updated_at', 'cache_uuid'):
+                if field_name in values:
+                    setattr(self, field_name, values[field_name])
+            if should_reload:
+                self.reload(fields=['log'])
+            else:
+                self.log = (self.log or '') + entry
+            return self
 
         if should_reload:
             # Update local data to ensure sure nothing else committed something
-            # to this record before we entered this transaction.
-            self.reload()
+            # to this record before we entered this transaction, and hold the row
+            # until it commits.
+            self.reload(fields=['log'], for_update=transaction.get_connection().in_atomic_block)
 
-        pre_log = '##################\n'
-        pre_log += '%s\n' % timezone.now().strftime('%b %d, %Y, %I:%M:%S %p UTC')
-        if desc:
-            pre_log += '**%s**\n' % desc
+        self.log = (self.log or '') + entry
+        return self
 
-        post_log = '\n##################\n'
+    def check_log_writable(self, should_save=True):
+        if self.pk is None and (should_save or self.log_storage == LOG_STORAGE_TABLE):
+            raise ValueError("Cannot append to the log of an unsaved {}; save() it first.".format(
+                self._meta.verbose_name))
 
-        self.log += '%s%s%s' % (pre_log, log, post_log,)
-        if should_save:
-            self.save()
+    @classmethod
+    def get_log_append_values(cls, appended):
+        """
+        Returns the ``update()`` kwargs appending the ``appended`` expression to the
+        ``log`` column. Like a ``save()`` would, they also bump ``updated_at``, and
+        rotate ``cache_uuid`` when ``log`` is one of the ``flush_cache_fields``.
+        """
+        values = {'log': Concat(Coalesce(F('log'), Value('')), appended, output_field=models.TextField())}
+        if 'updated_at' in cls.field_names():
+            values['updated_at'] = timezone.now()
+        if cls.is_log_flushing_cache():
+            values['cache_uuid'] = str(uuid.uuid4())
+        return values
 
-        return self
+    @classmethod
+    def is_log_flushing_cache(cls):
+        return hasattr(cls, '_get_all_flush_cache_fields') and 'log' in cls._get_all_flush_cache_fields()
+
+    @classmethod
+    def get_log_queryset(cls):
+        """
+        The queryset log appends are written with. A ``CacheUUIDQuerySet``, whenever
+        appends rotate ``cache_uuid``, so that the rotations get published.
+        """
+        queryset = cls._default_manager.all()
+        if cls.is_log_flushing_cache() and not isinstance(queryset, CacheUUIDQuerySet):
+            queryset = CacheUUIDQuerySet(model=cls, using=queryset.db)
+        return queryset
+
+    def get_log_entries(self):
+        """
+        Returns the ``LogEntry`` rows of this record, oldest first. Paginate or
+        ``iterator()`` over it as needed.
+        """
+        return LogEntry.objects.filter(content_type=self.get_content_type(), object_id=self.pk).order_by('pk')
+
+    def iter_log(self, chunk_size=64 * 1024):
+        """
+        Streams the log of this record as text without loading all of it at once:
+        one formatted entry at a time with ``LOG_STORAGE_TABLE``, or ``chunk_size``
+        characters at a time (via SQL ``Substr``) with ``LOG_STORAGE_COLUMN``.
+        """
+        if self.log_storage == LOG_STORAGE_TABLE:
+            for entry in self.get_log_entries().iterator():
+                yield entry.format()
+            return
+
+        queryset = type(self)._default_manager.filter(pk=self.pk)
+        position = 1
+        while True:
+            chunk = queryset.annotate(
+                log_chunk=Substr(Coalesce(F('log'), Value('')), position, chunk_size, output_field=models.TextField())
+            ).values_list('log_chunk', flat=True).get()
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            position += chunk_size
+
+
+class CacheUUIDQuerySet(models.QuerySet):
+    """
+    Keeps ``cache_uuid`` correct for bulk writes, which never go through ``save()``.
+
+    ``update()`` shares a single new UUID between every row it touches; cache keys
+    also carry the pk, so that still makes each row's cache stale. ``bulk_create()``
+    and ``bulk_update()`` give each obj its own, as ``save()`` does.
+    """
+
+    def get_flush_cache_field_names(self):
+        field_names = set()
+        for field_name in self.model._get_all_flush_cache_fields():
+            field = self.model._meta.get_field(field_name)
+            field_names.update([field.name, field.attname])
+        return field_names
+
+    def touches_flush_cache_fields(self, field_names):
+        return bool(self.get_flush_cache_field_names().intersection(field_names))
+
+    def update(self, **kwargs):
+        """
+        Rotates ``cache_uuid`` in the same UPDATE statement when any of the
+        ``flush_cache_fields`` is being set.
+        """
+        if 'cache_uuid' not in kwargs and self.touches_flush_cache_fields(kwargs):
+            kwargs['cache_uuid'] = str(uuid.uuid4())
+
+        if 'cache_uuid' not in kwargs or not invalidation_bus.is_enabled:
+            return super().update(**kwargs)
+
+        # One extra SELECT, only paid when other workers need to hear about it, and
+        # capped: past ``max_backlog`` rows a single clear-all event is published.
+        max_backlog = invalidation_bus.max_backlog
+        previous = list(self.values_list('pk', 'cache_uuid')[:max_backlog + 1])
+        rows = super().update(**kwargs)
+        if len(previous) > max_backlog:
+            invalidation_bus.publish_clear()
+        else:
+            content_type_id = ContentTypeRepo().get_for_model(self.model).pk
+            invalidation_bus.publish_many([
+                InvalidationEvent(content_type_id, pk, old_uuid, kwargs['cache_uuid'])
+                for pk, old_uuid in previous
+            ])
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.ensure_cache_uuid()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        Writes ``fields`` of every obj with one ``UPDATE`` per ``batch_size`` objs,
+        each column set with a ``CASE`` on the pk. Django 1.9 has no
+        ``QuerySet.bulk_update()`` of its own.
+
+        Rotates ``cache_uuid`` of every obj (and writes it) when any of the
+        ``flush_cache_fields`` is among ``fields``, and publishes the rotations.
+        Returns the number of rows updated.
+        """
+        objs = [obj for obj in objs if obj.pk is not None]
+        fields = [self.model._meta.get_field(field_name) for field_name in fields]
+        if not objs or not fields:
+            return 0
+
+        events = []
+        field_names = [field.name for field in fields]
+        if 'cache_uuid' not in field_names and self.touches_flush_cache_fields(field_names):
+            content_type_id = ContentTypeRepo().get_for_model(self.model).pk
+            for obj in objs:
+                previous_cache_uuid = obj.cache_uuid
+                obj.cache_uuid = str(uuid.uuid4())
+                if previous_cache_uuid:
+                    events.append(InvalidationEvent(content_type_id, obj.pk, previous_cache_uuid, obj.cache_uuid))
+            fields.append(self.model._meta.get_field('cache_uuid'))
+
+        batch_size = batch_size or len(objs)
+        rows = 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            for start in range(0, len(objs), batch_size):
+                batch = objs[start:start + batch_size]
+                values = {}
+                for field in fields:
+                    whens = [When(pk=obj.pk, then=Value(getattr(obj, field.attname), output_field=field))
+                             for obj in batch]
+                    values[field.attname] = Case(*whens, output_field=field)
+                # Straight to ``QuerySet.update()``: the UUIDs are already rotated.
+                rows += super(CacheUUIDQuerySet, self.filter(pk__in=[obj.pk for obj in batch])).update(**values)
+        invalidation_bus.publish_many(events)
+        return rows
+
+
+CacheUUIDManager = models.Manager.from_queryset(CacheUUIDQuerySet)
 
 
 class CacheUUIDModel(models.Model):
@@ -221,6 +597,8 @@ class CacheUUIDModel(models.Model):
     # Called by `self.get_flush_cache_fields()`
     flush_cache_fields = []
 
+    objects = CacheUUIDManager()
+
     class Meta:
         abstract = True
 
@@ -235,9 +613,12 @@ class CacheUUIDModel(models.Model):
         return False
 
     def flush_cache_uuid(self, should_save=True):
+        previous_cache_uuid = self.cache_uuid
         self.cache_uuid = str(uuid.uuid4())
         if should_save:
             self.save(should_consider_flushing_cache_uuid=False)
+            # ``save()`` only sees the new UUID, so publish the rotation from here.
+            self.publish_cache_uuid_rotation(previous_cache_uuid)
 
     def should_flush_cache_uuid(self):
         if self.detect_missing_tracker():
@@ -246,7 +627,8 @@ class CacheUUIDModel(models.Model):
         flush_cache_field_name_set = self._get_all_flush_cache_fields()
         return bool(flush_cache_field_name_set.intersection(changed_field_names))
 
-    def _get_all_flush_cache_fields(self):
+    @classmethod
+    def _get_all_flush_cache_fields(cls):
         """
         The super() version of this function no one should touch.
         Inheriting classes should implement `get_flush_cache_fields()` for their
@@ -255,9 +637,10 @@ class CacheUUIDModel(models.Model):
         @returns    :list:  List of field_name values (strings) that, when changed,
                             flush the cache value of this obj.
         """
-        return set(self._get_core_flush_cache_fields() + self.get_flush_cache_fields())
+        return set(cls._get_core_flush_cache_fields() + cls.get_flush_cache_fields())
 
-    def _get_core_flush_cache_fields(self):
+    @classmethod
+    def _get_core_flush_cache_fields(cls):
         """
         Returns the list of field names that ubiquitously result in a cache bust.
         None at this writing, but could foresee a global, changing column one day
@@ -265,18 +648,33 @@ class CacheUUIDModel(models.Model):
         """
         return []
 
-    def get_flush_cache_fields(self):
+    @classmethod
+    def get_flush_cache_fields(cls):
         """
-        Inheriting classes could implement this.
+        Inheriting classes could implement this, as a classmethod: querysets read it
+        off the model class, without an instance.
         """
-        return self.flush_cache_fields
+        return cls.flush_cache_fields
 
     def save(self, **kwargs):
+        previous_cache_uuid = self.cache_uuid
         if kwargs.pop('should_consider_flushing_cache_uuid', True) and self.should_flush_cache_uuid():
             self.flush_cache_uuid(should_save=False)
 
         self.ensure_cache_uuid()
+
+        # Partial saves must still persist a rotated UUID.
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.cache_uuid != previous_cache_uuid and 'cache_uuid' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['cache_uuid']
+
         super().save(**kwargs)
+        self.publish_cache_uuid_rotation(previous_cache_uuid)
+
+    def publish_cache_uuid_rotation(self, previous_cache_uuid):
+        if previous_cache_uuid and self.cache_uuid != previous_cache_uuid:
+            invalidation_bus.publish(ContentTypeRepo().get_for_model(type(self)).pk, self.pk,
+                                     previous_cache_uuid, self.cache_uuid)
 
     def ensure_cache_uuid(self):
         self.cache_uuid = self.cache_uuid or str(uuid.uuid4())
@@ -290,5 +688,73 @@ class BaseModel(BaseModelMixin, models.Model):
 
     serialization_excludes = ["created_at", "updated_at"]
 
+    # When True, ``save()`` on an existing record only writes the fields its
+    # ``tracker`` (a ``model_utils.FieldTracker``) reports as changed, plus
+    # ``updated_at``, and skips the UPDATE entirely when nothing changed.
+    save_changed_fields_only = False
+
     class Meta:
         abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.save_changed_fields_only and not args and 'update_fields' not in kwargs:
+            update_fields = self.get_changed_update_fields(**kwargs)
+            if update_fields is not None:
+                if not update_fields:
+                    return
+                kwargs['update_fields'] = update_fields
+
+        super().save(*args, **kwargs)
+
+    def get_changed_update_fields(self, force_insert=False, **kwargs):
+        """
+        Returns the ``update_fields`` of a dirty-field save, or ``None`` when a full
+        save is required (unsaved record, forced insert, or no ``tracker`` tracking
+        every concrete field).
+        """
+        if force_insert or self._state.adding or self.pk is None or not self.tracks_all_fields():
+            return None
+
+        changed = set(self.tracker.changed())
+        if not changed:
+            return []
+
+        if 'updated_at' in self.field_names():
+            changed.add('updated_at')
+        return sorted(changed)
+
+    def tracks_all_fields(self):
+        """
+        Whether the ``tracker`` sees changes to every concrete field. It doesn't with
+        ``FieldTracker(fields=[...])``, nor for the parent fields of multi-table
+        inheritance, as it only tracks ``_meta.local_fields`` by default.
+        """
+        if not hasattr(self, 'tracker'):
+            return False
+        tracked = set(self.tracker.fields)
+        return all(field.name in tracked or field.attname in tracked
+                   for field in self._meta.concrete_fields if not field.primary_key)
+
+
+class LogEntry(models.Model):
+    """
+    One ``append_to_log()`` entry for a model using ``LOG_STORAGE_TABLE``.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    object_id = models.PositiveIntegerField()
+    obj = GenericForeignKey('content_type', 'object_id')
+
+    desc = models.CharField(max_length=LOG_ENTRY_DESC_MAX_LENGTH, blank=True)
+    text = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        index_together = [('content_type', 'object_id')]
+        verbose_name = "Log Entry"
+        verbose_name_plural = "Log Entries"
+
+    def __str__(self):
+        return '{} {}: {}'.format(self.content_type_id, self.object_id, self.desc or self.created_at)
+
+    def format(self):
+        return format_log_entry(self.text, self.desc, self.created_at)
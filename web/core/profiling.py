@@ -0,0 +1,317 @@
+from __future__ import unicode_literals
+import heapq
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Django
+from django.conf import settings
+from django.db.backends.utils import CursorWrapper
+
+# Local Apps
+from core.utils import ContextVar, HistogramRegistry
+
+
+# Every finished span lands here, labeled by its name.
+timings = HistogramRegistry()
+
+# Whole-request latencies, labeled by URL name. Fed by ``core.middleware.TimeRequests``.
+route_latency = HistogramRegistry()
+
+# ``time.perf_counter_ns()`` is Python 3.7+.
+perf_counter_ns = getattr(time, 'perf_counter_ns', None) or (lambda: int(time.perf_counter() * 1e9))
+
+_UNSAMPLED = object()
+_current_span = ContextVar('core_current_span', default=None)
+
+
+class Span(object):
+    """
+    One timed section of code. Spans opened while another is running become its
+    children, so a request yields a tree of timed sections.
+    """
+    __slots__ = ('name', 'parent', 'children', 'start_ns', 'duration_ns',)
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.start_ns = perf_counter_ns()
+        self.duration_ns = None
+
+    @property
+    def duration_ms(self):
+        return self.duration_ns / 1e6 if self.duration_ns is not None else None
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'ms': round(self.duration_ms, 3) if self.duration_ns is not None else None,
+            'children': [child.as_dict() for child in self.children],
+        }
+
+    def format_tree(self, depth=0):
+        lines = ['%s%s : %0.3f seconds' % ('  ' * depth, self.name, self.duration_ns / 1e9,)]
+        for child in self.children:
+            lines.extend(child.format_tree(depth + 1))
+        return lines
+
+
+def get_current_span():
+    span = _current_span.get()
+    return None if span is _UNSAMPLED else span
+
+
+def get_sample_rate():
+    return getattr(settings, 'STOPWATCH_SAMPLE_RATE', 0.0)
+
+
+@contextmanager
+def span(name):
+    """
+    Times the enclosed block into ``timings[name]`` and the current span tree.
+
+    Root spans are sampled at ``STOPWATCH_SAMPLE_RATE`` (always under ``DEBUG``) and
+    nested spans follow their root's decision. With sampling off, this costs a
+    contextvar lookup and a settings read.
+    """
+    parent = _current_span.get()
+    if parent is _UNSAMPLED:
+        yield None
+        return
+
+    if parent is None and not settings.DEBUG:
+        rate = get_sample_rate()
+        if not rate:
+            yield None
+            return
+
+        if random.random() >= rate:
+            token = _current_span.set(_UNSAMPLED)
+            try:
+                yield None
+            finally:
+                _current_span.reset(token)
+            return
+
+    current = Span(name, parent)
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.duration_ns = perf_counter_ns() - current.start_ns
+        _current_span.reset(token)
+        timings.record(name, current.duration_ms)
+
+        if parent is not None:
+            parent.children.append(current)
+        elif settings.DEBUG:
+            print('\n'.join(current.format_tree()))
+
+        ensure_exporter()
+
+
+class TimingsExporter(threading.Thread):
+    """
+    Background thread flushing ``timings`` aggregates every ``interval`` seconds,
+    either as one JSON line appended to ``path`` or as an INFO log line on
+    the ``core.profiling`` logger. Aggregates are reset as they are read.
+    """
+    daemon = True
+
+    def __init__(self, registry, interval, path=None):
+        super().__init__(name='core-timings-exporter')
+        self.registry = registry
+        self.interval = interval
+        self.path = path
+        self.logger = logging.getLogger('core.profiling')
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+    def flush(self):
+        snapshot = self.registry.snapshot(should_reset=True)
+        if not snapshot:
+            return
+
+        line = json.dumps({'pid': os.getpid(), 'ts': time.time(), 'timings': snapshot}, sort_keys=True)
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+        else:
+            self.logger.info(line)
+
+
+_exporter = None
+_exporter_pid = None
+_exporter_lock = threading.Lock()
+
+
+def ensure_exporter():
+    """
+    Starts the exporter for this process if ``STOPWATCH_EXPORT_INTERVAL`` is set.
+    Checked by pid, so forked workers each get their own thread.
+    """
+    global _exporter, _exporter_pid
+
+    if _exporter_pid == os.getpid():
+        return
+
+    interval = getattr(settings, 'STOPWATCH_EXPORT_INTERVAL', None)
+    if not interval:
+        return
+
+    with _exporter_lock:
+        if _exporter_pid != os.getpid():
+            _exporter = TimingsExporter(timings, interval, path=getattr(settings, 'STOPWATCH_EXPORT_PATH', None))
+            _exporter.start()
+            _exporter_pid = os.getpid()
+
+
+_string_literal_re = re.compile(r"'(?:[^']|'')*'")
+_number_literal_re = re.compile(r"\b\d+(?:\.\d+)?\b")
+_in_list_re = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_whitespace_re = re.compile(r"\s+")
+
+
+def fingerprint_sql(sql):
+    """
+    Normalizes literals out of ``sql`` so that queries differing only in their
+    parameters (the typical N+1 pattern) share a fingerprint.
+    """
+    sql = _string_literal_re.sub('?', sql)
+    sql = _number_literal_re.sub('?', sql)
+    sql = _in_list_re.sub('IN (...)', sql)
+    return _whitespace_re.sub(' ', sql).strip()
+
+
+class QueryProfile(object):
+    """
+    Counts and times the queries of one request, grouped by fingerprint. Instances
+    are callable with the signature of ``connection.execute_wrapper()`` hooks.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.by_fingerprint = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, (perf_counter_ns() - start) / 1e6)
+
+    def record(self, sql, ms):
+        self.count += 1
+        self.total_ms += ms
+
+        fingerprint = fingerprint_sql(sql)
+        stats = self.by_fingerprint.get(fingerprint)
+        if stats is None:
+            stats = self.by_fingerprint[fingerprint] = {'count': 0, 'total_ms': 0.0, 'example': sql}
+        stats['count'] += 1
+        stats['total_ms'] += ms
+
+    def duplicates(self, threshold):
+        """
+        Returns ``(fingerprint, stats)`` pairs run at least ``threshold`` times, worst first.
+        """
+        found = [(fingerprint, stats,) for fingerprint, stats in self.by_fingerprint.items() if stats['count'] >= threshold]
+        return sorted(found, key=lambda item: item[1]['count'], reverse=True)
+
+
+class ProfilingCursorWrapper(CursorWrapper):
+    """
+    Wraps the cursor a connection would have returned, handing every execution to
+    ``profile`` (see ``QueryProfile.__call__()``). Query logging under ``DEBUG`` is
+    left to the wrapped cursor.
+    """
+
+    def __init__(self, cursor, db, profile):
+        super(ProfilingCursorWrapper, self).__init__(cursor, db)
+        self.profile = profile
+
+    def execute(self, sql, params=None):
+        return self.profile(lambda sql, params, many, context: self.cursor.execute(sql, params),
+                            sql, params, False, {'connection': self.db, 'cursor': self})
+
+    def executemany(self, sql, param_list):
+        return self.profile(lambda sql, params, many, context: self.cursor.executemany(sql, params),
+                            sql, param_list, True, {'connection': self.db, 'cursor': self})
+
+
+class CursorProfileHook(object):
+    """
+    Context manager standing in for ``connection.execute_wrapper(profile)`` on
+    Django versions without it: while entered, cursors made by ``connection`` are
+    wrapped in a ``ProfilingCursorWrapper``. Connections are per thread, so this
+    only sees the current thread's queries.
+    """
+    hooked_methods = ('make_cursor', 'make_debug_cursor',)
+
+    def __init__(self, connection, profile):
+        self.connection = connection
+        self.profile = profile
+        self._previous = {}
+
+    def wrap(self, make_cursor):
+        def make_profiled_cursor(cursor):
+            return ProfilingCursorWrapper(make_cursor(cursor), self.connection, self.profile)
+        return make_profiled_cursor
+
+    def __enter__(self):
+        for name in self.hooked_methods:
+            self._previous[name] = self.connection.__dict__.get(name)
+            setattr(self.connection, name, self.wrap(getattr(self.connection, name)))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for name in self.hooked_methods:
+            previous = self._previous.pop(name, None)
+            if previous is None:
+                self.connection.__dict__.pop(name, None)
+            else:
+                setattr(self.connection, name, previous)
+
+
+class WorstRequests(object):
+    """
+    Keeps the ``size`` requests with the highest query time seen by this process.
+    """
+
+    def __init__(self, size=20):
+        self.size = size
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def consider(self, total_ms, entry):
+        with self._lock:
+            item = (total_ms, id(entry), entry,)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            elif total_ms > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def snapshot(self):
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, key=lambda item: item[0], reverse=True)]
+
+    def reset(self):
+        with self._lock:
+            self._heap = []
+
+
+worst_query_requests = WorstRequests()
@@ -75,6 +75,22 @@ INSTALLED_APPS = THIRD_PARTY_APPS + DJANGO_APPS + LOCAL_APPS
 
 
 AUTH_USER_MODEL = 'users.User'
+AUTHENTICATION_BACKENDS = (
+    'users.backends.PooledModelBackend',
+)
+PASSWORD_HASHERS = [
+    'users.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.BCryptPasswordHasher',
+    'django.contrib.auth.hashers.SHA1PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    'django.contrib.auth.hashers.CryptPasswordHasher',
+]
+# Fast and insecure; only for tests and local superusers. Never use it in production.
+FAST_PASSWORD_HASHER = 'django.contrib.auth.hashers.MD5PasswordHasher'
+if TESTING:
+    PASSWORD_HASHERS = [FAST_PASSWORD_HASHER] + PASSWORD_HASHERS
 LOGIN_REDIRECT_URL = '/'
 LOGIN_URL = '/login'
 
@@ -82,6 +98,8 @@ LOGIN_URL = '/login'
 CRISPY_TEMPLATE_PACK = "bootstrap3"
 
 MIDDLEWARE_CLASSES = (
+    'core.middleware.RequestCache',
+    'core.middleware.PollInvalidations',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -96,10 +114,11 @@ MIDDLEWARE_CLASSES = (
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Absolute, so lookups don't depend on the working directory. BASE_DIR
+        # serves templates referenced by path, like 'core/templates/admin/...'.
         'DIRS': [
-            '',
-            'templates/',
-            'django/contrib/sitemaps/templates/',
+            os.path.join(BASE_DIR, 'templates'),
+            BASE_DIR,
         ],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -157,3 +176,83 @@ SUIT_CONFIG = {
     # http://django-suit.readthedocs.org/en/stableelop/configuration.html#search-url
     'SEARCH_URL': '',
 }
+
+
+# Serialized object cache
+# See `core.cache.SerializedObjectCache`
+SERIALIZATION_CACHE_ALIAS = 'default'
+SERIALIZATION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Cache alias used to share the ContentType registry between worker processes.
+# See `core.utils.ContentTypeRepo`. ``None`` keeps it per-process.
+CONTENT_TYPE_REPO_CACHE_ALIAS = None
+
+# Outbound HTTP client (`core.utils.requests`)
+HTTP_CLIENT_TIMEOUT = 10
+HTTP_CLIENT_POOL_MAXSIZE = 10
+HTTP_CLIENT_POOL_BLOCK = False
+HTTP_CLIENT_MAX_RETRIES = 2
+HTTP_CLIENT_BACKOFF_FACTOR = 0.2
+HTTP_CLIENT_FAN_OUT_MAX_WORKERS = 8
+
+# `core.decorators.stopwatch` / `core.profiling`
+# Fraction of root stopwatches timed outside of DEBUG (0.0 disables timing).
+STOPWATCH_SAMPLE_RATE = 0.0
+# Seconds between aggregate flushes; ``None`` disables the exporter.
+STOPWATCH_EXPORT_INTERVAL = None
+# File receiving one JSON line per flush; ``None`` logs to `core.profiling` instead.
+STOPWATCH_EXPORT_PATH = None
+
+# `core.middleware.ProfileQueries`
+SQL_PROFILER_SAMPLE_RATE = 1.0
+SQL_PROFILER_DUPLICATE_THRESHOLD = 5
+SQL_PROFILER_SLOW_MS = 500
+SQL_PROFILER_HEADERS = False
+
+# Buffered `append_to_log()` writes (`core.logbuffer`)
+LOG_BUFFER_ENABLED = False
+LOG_BUFFER_FLUSH_SIZE = 500
+LOG_BUFFER_FLUSH_INTERVAL = 1.0
+LOG_BUFFER_MAX_ATTEMPTS = 3
+LOG_BUFFER_MAX_DEAD_LETTERS = 100
+
+# Cross-process `cache_uuid` invalidation (`core.invalidation`)
+# Needs a cache backend shared by all workers, with an atomic `incr()`. Point it at
+# the shared alias rather than a `core.cache.TwoTierCache`, whose reads may be stale.
+CACHE_INVALIDATION_BUS_ENABLED = False
+CACHE_INVALIDATION_ALIAS = 'default'
+CACHE_INVALIDATION_POLL_INTERVAL = 1.0
+CACHE_INVALIDATION_EVENT_TTL = 300
+CACHE_INVALIDATION_MAX_BACKLOG = 1000
+
+# Timezone cached by `core.middleware.LocalizeTimezone`
+TIMEZONE_COOKIE_NAME = 'tz'
+TIMEZONE_COOKIE_MAX_AGE = 60 * 60 * 24 * 30
+# Holds the versions that void cookies of users whose timezone changed. Must be an
+# alias shared by all workers; ``None`` disables the cookie.
+TIMEZONE_VERSION_CACHE_ALIAS = None
+
+# Worker boot (`core.warmup`)
+WARMUP_ON_BOOT = False
+WARMUP_IMPORTS = (
+    'requests',
+    'concurrent.futures',
+)
+WARMUP_TEMPLATES = (
+    'base.html',
+    'users/profile-edit.html',
+)
+
+# `{% objectcache %}` fragments (`core.templatetags.fragments`)
+TEMPLATE_FRAGMENT_CACHE_ENABLED = True
+TEMPLATE_FRAGMENT_CACHE_ALIAS = 'default'
+TEMPLATE_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Password hashing (`users.hashers`, `users.backends`)
+PASSWORD_HASHING_ITERATIONS = None  # Django's default for PBKDF2
+PASSWORD_HASHING_POOL_SIZE = 0 if TESTING else 2
+PASSWORD_HASHING_TIMEOUT = 10
+PASSWORD_REHASH_ON_LOGIN = False
+
+# `manage.py benchmark` (`core.benchmarks`)
+BENCHMARK_PREFORK_PATH = '/admin/login/'
@@ -13,13 +13,26 @@ CACHES = {
 }
 
 
-MIDDLEWARE_CLASSES += (
+# TimeRequests goes first so its timings cover every other middleware.
+MIDDLEWARE_CLASSES = ('core.middleware.TimeRequests',) + MIDDLEWARE_CLASSES + (
+    'core.middleware.ProfileQueries',
     'core.middleware.LogStuff',
-    'core.middleware.TimeRequests',
 )
 
 ENV = "local"
 
+SQL_PROFILER_HEADERS = True
+
+# ``runserver`` is a single process, so its LocMem cache is shared by all requests.
+TIMEZONE_VERSION_CACHE_ALIAS = 'default'
+
+# Template edits should show up on reload.
+TEMPLATE_FRAGMENT_CACHE_ENABLED = False
+
+# Local superusers don't need a slow hash.
+if 'createsuperuser' in sys.argv:
+    PASSWORD_HASHERS = [FAST_PASSWORD_HASHER] + PASSWORD_HASHERS
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
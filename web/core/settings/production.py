@@ -0,0 +1,25 @@
+from .base import *  # NOQA
+
+DEBUG = False
+
+ENV = "production"
+
+
+# Templates are compiled once per process and kept. ``APP_DIRS`` can't be combined
+# with explicit loaders, so the app directories loader is listed instead.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# With the cached loader, templates compiled before forking are shared by workers.
+WARMUP_ON_BOOT = True
+
+
+try:
+    from override import *
+except ImportError:
+    pass
@@ -0,0 +1,121 @@
+from __future__ import unicode_literals
+
+# Django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import StreamingHttpResponse
+
+
+class StreamingJSONEncoder(DjangoJSONEncoder):
+    """
+    ``DjangoJSONEncoder`` that falls back to ``str()`` for anything else a column
+    might hold (e.g. pytz timezones from a ``TimeZoneField``).
+    """
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def get_streamable_fields(model):
+    """
+    Returns the concrete fields of ``model`` that ``serialize()`` would include,
+    which is ``field_names()`` minus the serialization excludes.
+    """
+    excludes = set(model.get_serialization_excludes())
+    return [field for field in model._meta.fields if field.name not in excludes]
+
+
+def format_date(value):
+    # What ``DateField.value_to_string()`` returns, and so ``serialize()`` too.
+    return '' if value is None else value.isoformat()
+
+
+def get_value_formatter(field):
+    """
+    Returns a callable turning a ``values_list()`` value of ``field`` into what
+    ``BaseModelMixin.get_field_value()`` returns for it, or ``None`` when the value
+    is used as is.
+    """
+    if field.is_relation:
+        return lambda value: {'id': value}
+    elif isinstance(field, models.DateField):  # Covers both DateTimeField and DateField
+        return format_date
+    return None
+
+
+def iter_values(queryset, columns, chunk_size=1000):
+    """
+    Yields one tuple of ``columns`` per row, fetching ``chunk_size`` rows at a time
+    with keyset pagination on the primary key. Only one chunk is ever held in memory,
+    regardless of how many rows the queryset matches.
+
+    Note that rows are always yielded in primary key order.
+    """
+    assert queryset.query.can_filter(), "Cannot stream a sliced queryset."
+
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        count = 0
+        for row in chunk.values_list('pk', *columns)[:chunk_size].iterator():
+            count += 1
+            last_pk = row[0]
+            yield row[1:]
+
+        if count < chunk_size:
+            return
+
+
+def stream_json(queryset, chunk_size=1000, encoder_class=StreamingJSONEncoder):
+    """
+    Generator of UTF-8 JSON bytes representing ``queryset`` as a list of objects
+    shaped like ``serialize()`` output: dates and datetimes are ISO 8601 strings
+    as ``value_to_string()`` renders them, relations are rendered as ``{"id": <pk>}``
+    (without ``add_to_serialization_as_relation()``), and no model instances are
+    ever built.
+
+    One chunk of bytes is yielded per ``chunk_size`` rows, so the first bytes go out
+    before the last row has been read.
+    """
+    fields = get_streamable_fields(queryset.model)
+    columns = [field.attname for field in fields]
+    formatters = [get_value_formatter(field) for field in fields]
+    names = [field.name for field in fields]
+    encoder = encoder_class()
+
+    yield b'['
+    separator = ''
+    buf = []
+    for row in iter_values(queryset, columns, chunk_size=chunk_size):
+        obj = {}
+        for name, value, formatter in zip(names, row, formatters):
+            obj[name] = formatter(value) if formatter is not None else value
+
+        buf.append(encoder.encode(obj))
+        if len(buf) >= chunk_size:
+            yield (separator + ','.join(buf)).encode('utf-8')
+            separator = ','
+            buf = []
+
+    if buf:
+        yield (separator + ','.join(buf)).encode('utf-8')
+    yield b']'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Streams a JSON list of the rows in ``queryset``. Memory stays flat no matter
+    how many rows are returned.
+
+    Usage:
+        return StreamingJSONResponse(User.objects.filter(is_active=True))
+    """
+
+    def __init__(self, queryset, chunk_size=1000, filename=None, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(stream_json(queryset, chunk_size=chunk_size), **kwargs)
+        if filename:
+            self['Content-Disposition'] = 'attachment; filename="%s"' % (filename,)
@@ -0,0 +1,90 @@
+from __future__ import unicode_literals
+import hashlib
+
+# Django
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.encoding import force_bytes
+
+
+register = template.Library()
+
+
+def get_object_version(obj):
+    """
+    Returns what identifies the current state of ``obj``: its ``cache_uuid`` when it
+    has one (see ``CacheUUIDModel``), else its ``updated_at``. Note that neither
+    changes on a queryset ``update()`` that doesn't touch them.
+    """
+    version = getattr(obj, 'cache_uuid', None) or getattr(obj, 'updated_at', None)
+    return version.isoformat() if hasattr(version, 'isoformat') else version
+
+
+def make_object_fragment_key(fragment_name, obj=None, vary_on=()):
+    """
+    Builds the cache key of a ``{% objectcache %}`` fragment. Fragments of an object
+    without a ``pk`` or a version are shared by everyone, like those of ``None``.
+    """
+    key = 'fragment:%s' % (fragment_name,)
+    version = get_object_version(obj) if obj is not None else None
+    if obj is not None and obj.pk and version:
+        key += ':%s.%s:%s:%s' % (obj._meta.app_label, obj._meta.model_name, obj.pk, version,)
+    if vary_on:
+        key += ':%s' % (hashlib.md5(force_bytes(':'.join(str(var) for var in vary_on))).hexdigest(),)
+    return key
+
+
+class ObjectCacheNode(template.Node):
+
+    def __init__(self, nodelist, obj, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.obj = obj
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        if not getattr(settings, 'TEMPLATE_FRAGMENT_CACHE_ENABLED', True):
+            return self.nodelist.render(context)
+
+        obj = self.obj.resolve(context)
+        key = make_object_fragment_key(self.fragment_name.resolve(context), obj,
+                                       [var.resolve(context) for var in self.vary_on])
+
+        backend = caches[getattr(settings, 'TEMPLATE_FRAGMENT_CACHE_ALIAS', 'default')]
+        value = backend.get(key)
+        if value is None:
+            value = self.nodelist.render(context)
+            backend.set(key, value, getattr(settings, 'TEMPLATE_FRAGMENT_CACHE_TIMEOUT', 60 * 60))
+        return value
+
+
+@register.tag('objectcache')
+def do_objectcache(parser, token):
+    """
+    Caches a template fragment until ``obj`` changes: the key includes the object's
+    ``cache_uuid`` (or ``updated_at``), so a save that matters yields a new fragment
+    and the old one ages out. Pass ``None`` for fragments that are the same for
+    everyone. Extra arguments are varied on, like with ``{% cache %}``.
+
+    Never wrap anything that depends on the request beyond ``obj``, such as a
+    ``{% csrf_token %}`` or a bound form.
+
+    Usage:
+        {% load fragments %}
+        {% objectcache request.user "navbar" %}
+            ...
+        {% endobjectcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError("'%s' tag requires an object and a fragment name." % (bits[0],))
+
+    nodelist = parser.parse(('endobjectcache',))
+    parser.delete_first_token()
+    return ObjectCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
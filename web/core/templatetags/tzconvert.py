@@ -0,0 +1,38 @@
+from __future__ import unicode_literals
+
+# Django
+from django import template
+
+# Local Apps
+from core.tzconvert import annotate_localtimes, localize_many
+
+
+register = template.Library()
+
+
+@register.filter
+def localtimes(values, zone=None):
+    """
+    Converts a list of datetimes to the current (or given) timezone in one pass.
+
+    Usage:
+        {% load tzconvert %}
+        {% for created_at in timestamps|localtimes %}...{% endfor %}
+        {% for created_at in timestamps|localtimes:"Europe/Paris" %}...{% endfor %}
+    """
+    return localize_many(values, zone or None)
+
+
+@register.filter
+def with_localtimes(objs, field_name):
+    """
+    Returns ``objs`` as a list with ``<field_name>_local`` set on each, in the current
+    timezone. Rendering those attributes needs no further conversion, so wrap them in
+    ``{% localtime off %}``.
+
+    Usage:
+        {% for order in orders|with_localtimes:"created_at" %}
+            {% localtime off %}{{ order.created_at_local }}{% endlocaltime %}
+        {% endfor %}
+    """
+    return annotate_localtimes(objs, field_name)
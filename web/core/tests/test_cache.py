@@ -0,0 +1,101 @@
+from __future__ import unicode_literals
+
+# Django
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+
+# Local Apps
+from core.cache import CompressedValue, TwoTierCache, _local_tiers
+
+
+class PlainBytesCache(LocMemCache):
+    """
+    Hands ``bytes`` subclasses back as plain ``bytes``, like the memcached clients.
+    """
+
+    def set(self, key, value, *args, **kwargs):
+        if isinstance(value, bytes):
+            value = bytes(value)
+        return super().set(key, value, *args, **kwargs)
+
+    def set_many(self, data, *args, **kwargs):
+        return super().set_many({key: bytes(value) if isinstance(value, bytes) else value
+                                 for key, value in data.items()}, *args, **kwargs)
+
+
+@override_settings(CACHES={
+    'shared': {
+        'BACKEND': 'core.tests.test_cache.PlainBytesCache',
+        'LOCATION': 'two-tier-tests',
+    },
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'COMPRESS_MIN_LENGTH': 100},
+    },
+})
+class TwoTierCacheTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def tearDown(self):
+        _local_tiers.clear()
+
+    def test_compressed_round_trip_through_plain_bytes_backend(self):
+        value = {'text': 'x' * 1000, 'raw': b'y' * 1000}
+        self.cache.set('big', value)
+        self.assertIsInstance(caches['shared'].get('big'), CompressedValue)
+
+        self.cache.clear_local()
+        self.assertEqual(self.cache.get('big'), value)
+
+        self.cache.clear_local()
+        self.assertEqual(self.cache.get_many(['big']), {'big': value})
+
+    def test_bytes_values_are_not_mistaken_for_compressed(self):
+        self.cache.set_many({'small': b'abc', 'large': b'z' * 500})
+        self.cache.clear_local()
+        self.assertEqual(self.cache.get_many(['small', 'large']), {'small': b'abc', 'large': b'z' * 500})
+
+    def test_local_copies_are_not_shared(self):
+        self.cache.set('mutable', {'count': 1})
+        self.cache.get('mutable')['count'] = 2
+        self.assertEqual(self.cache.get('mutable'), {'count': 1})
+
+
+@override_settings(CACHES={
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-timeout-tests',
+    },
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'LOCAL_TIMEOUT': None},
+    },
+})
+class TwoTierCacheLocalTimeoutTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def tearDown(self):
+        _local_tiers.clear()
+
+    def test_no_local_timeout_keeps_entries(self):
+        self.cache.set('kept', 1)
+        caches['shared'].delete('kept')
+        self.assertEqual(self.cache.get('kept'), 1)
+
+    def test_local_ttls(self):
+        def get_local_ttls(local_timeout):
+            cache = TwoTierCache('shared', {'OPTIONS': {'LOCAL_TIMEOUT': local_timeout}})
+            return [cache.get_local_ttl(timeout) for timeout in (None, 30, 0,)]
+
+        self.assertEqual(get_local_ttls(None), [None, 30, 0])
+        self.assertEqual(get_local_ttls(5), [5, 5, 0])
+        self.assertEqual(get_local_ttls(0), [0, 0, 0])
@@ -0,0 +1,87 @@
+from __future__ import unicode_literals
+from unittest import mock
+
+# Django
+from django.test import SimpleTestCase, override_settings
+
+# Local Apps
+from core.decorators import PROCESS, SHARED, memoize
+from core.utils import make_memoize_key
+
+
+def make_counted(**kwargs):
+    calls = []
+
+    @memoize(**kwargs)
+    def echo(*args, **kw):
+        calls.append(args)
+        return args[0] if args else None
+    return echo, calls
+
+
+class MemoizeKeyTestCase(SimpleTestCase):
+
+    def test_typed_keys(self):
+        echo, calls = make_counted(scope=PROCESS)
+        self.assertEqual(echo(1), 1)
+        self.assertEqual(echo('1'), '1')
+        self.assertIs(echo(True), True)
+        self.assertEqual(echo(1), 1)
+        self.assertEqual(calls, [(1,), ('1',), (True,)])
+
+    def test_equal_dicts_and_sets_share_a_key(self):
+        self.assertEqual(make_memoize_key(({'a': 1, 'b': 2},), {}), make_memoize_key(({'b': 2, 'a': 1},), {}))
+        self.assertEqual(make_memoize_key(({3, 'x', 1},), {}), make_memoize_key(({1, 3, 'x'},), {}))
+        self.assertNotEqual(make_memoize_key(([1],), {}), make_memoize_key(((1,),), {}))
+
+    def test_unhashable_arguments_raise(self):
+        with self.assertRaises(TypeError):
+            make_memoize_key((bytearray(b'x'),), {})
+
+    def test_unhashable_arguments_bypass_the_cache(self):
+        echo, calls = make_counted(scope=PROCESS)
+        arg = bytearray(b'x')
+        echo(arg)
+        echo(arg)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(echo.cache_info()['currsize'], 0)
+
+
+class MemoizeStoreTestCase(SimpleTestCase):
+
+    def test_lru_eviction(self):
+        echo, calls = make_counted(scope=PROCESS, maxsize=2)
+        echo(1)
+        echo(2)
+        echo(1)  # 2 is now the least recently used.
+        echo(3)
+        echo(1)
+        echo(2)
+        self.assertEqual(calls, [(1,), (2,), (3,), (2,)])
+        self.assertEqual(echo.cache_info()['currsize'], 2)
+
+    def test_ttl_expiry(self):
+        echo, calls = make_counted(scope=PROCESS, ttl=10)
+        with mock.patch('core.utils.time.monotonic', return_value=100.0):
+            echo(1)
+            echo(1)
+        with mock.patch('core.utils.time.monotonic', return_value=109.0):
+            echo(1)
+        with mock.patch('core.utils.time.monotonic', return_value=110.0):
+            echo(1)
+        self.assertEqual(calls, [(1,), (1,)])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                           'LOCATION': 'memoize-tests'}})
+    def test_shared_scope_caches_none_but_not_the_marker_text(self):
+        @memoize(scope=SHARED)
+        def lookup(value):
+            calls.append(value)
+            return value or None
+
+        calls = []
+        self.assertIsNone(lookup(''))
+        self.assertIsNone(lookup(''))
+        self.assertEqual(lookup('__memoize_none__'), '__memoize_none__')
+        self.assertEqual(lookup('__memoize_none__'), '__memoize_none__')
+        self.assertEqual(calls, ['', '__memoize_none__'])
@@ -0,0 +1,109 @@
+from __future__ import unicode_literals
+from unittest import mock
+
+# 3rd Party
+import pytz
+
+# Django
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+# Local Apps
+from core.middleware import LocalizeTimezone, ProfileQueries, forget_timezone, get_timezone_cookie_name
+
+
+PARIS = pytz.timezone('Europe/Paris')
+
+
+@override_settings(TIMEZONE_VERSION_CACHE_ALIAS='default')
+class LocalizeTimezoneTestCase(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = mock.Mock(pk=1)
+        self.user.is_authenticated.return_value = True
+        self.user.get_timezone.return_value = PARIS
+
+    def make_request(self, cookie=None):
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = 'session'
+        if cookie is not None:
+            request.COOKIES[get_timezone_cookie_name()] = cookie
+        request.session = {SESSION_KEY: '1'}
+        request.user = self.user
+        return request
+
+    def get_zone(self, cookie=None):
+        """
+        Returns ``(zone, cookie,)`` for one request: the zone it localized to, and
+        the timezone cookie it set, if any.
+        """
+        middleware = LocalizeTimezone()
+        request = self.make_request(cookie)
+        middleware.process_request(request)
+        zone = request.timezone.zone
+        response = middleware.process_response(request, HttpResponse())
+        morsel = response.cookies.get(get_timezone_cookie_name())
+        return zone, morsel.value if morsel is not None else None
+
+    def test_cookie_skips_the_user(self):
+        zone, cookie = self.get_zone()
+        self.assertEqual(zone, 'Europe/Paris')
+        self.assertIsNotNone(cookie)
+
+        self.user.get_timezone.reset_mock()
+        self.assertEqual(self.get_zone(cookie), ('Europe/Paris', None,))
+        self.user.get_timezone.assert_not_called()
+
+    def test_missing_version_voids_the_cookie(self):
+        _, cookie = self.get_zone()
+        caches['default'].clear()
+
+        self.user.get_timezone.reset_mock()
+        _, new_cookie = self.get_zone(cookie)
+        self.user.get_timezone.assert_called_once_with()
+        self.assertNotEqual(new_cookie, cookie)
+
+    def test_forget_timezone_voids_other_sessions(self):
+        _, cookie = self.get_zone()
+        forget_timezone(self.make_request(), self.user)
+
+        self.user.get_timezone.reset_mock()
+        self.get_zone(cookie)
+        self.user.get_timezone.assert_called_once_with()
+
+    @override_settings(TIMEZONE_VERSION_CACHE_ALIAS=None)
+    def test_no_cookie_without_a_version_cache(self):
+        self.assertEqual(self.get_zone(), ('Europe/Paris', None,))
+
+
+@override_settings(SQL_PROFILER_SAMPLE_RATE=1.0, SQL_PROFILER_HEADERS=True)
+class ProfileQueriesTestCase(TestCase):
+
+    def run_queries(self, count):
+        middleware = ProfileQueries()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+        for _ in range(count):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        return middleware.process_response(request, HttpResponse())
+
+    def test_counts_queries(self):
+        response = self.run_queries(3)
+        self.assertEqual(response['X-Query-Count'], '3')
+        self.assertEqual(response['X-Query-Duplicates'], '0')
+
+    def test_counts_queries_once_the_query_log_is_full(self):
+        connection.queries_log.extend({'sql': 'SELECT 0', 'time': '0.000'} for _ in range(connection.queries_limit))
+        try:
+            with self.assertLogs('core.middleware.queries', 'WARNING'):
+                response = self.run_queries(6)
+        finally:
+            connection.queries_log.clear()
+        self.assertEqual(response['X-Query-Count'], '6')
+        self.assertEqual(response['X-Query-Duplicates'], '1')
@@ -0,0 +1,191 @@
+from __future__ import unicode_literals
+from unittest import mock
+
+# Django
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# 3rd Party
+from model_utils import FieldTracker
+
+# Local Apps
+from core.models import BaseModel, CacheUUIDModel
+
+
+class TrackedRecord(CacheUUIDModel, BaseModel):
+    name = models.CharField(max_length=50, blank=True)
+    notes = models.CharField(max_length=50, blank=True)
+    log = models.TextField(blank=True)
+
+    flush_cache_fields = ['name']
+    save_changed_fields_only = True
+    tracker = FieldTracker()
+
+    class Meta:
+        app_label = 'core'
+        # Test-only: no migration, the table is made by ``ChangedUpdateFieldsTestCase``.
+        managed = False
+
+
+class PartiallyTrackedRecord(BaseModel):
+    name = models.CharField(max_length=50, blank=True)
+    notes = models.CharField(max_length=50, blank=True)
+
+    save_changed_fields_only = True
+    tracker = FieldTracker(fields=['name'])
+
+    class Meta:
+        app_label = 'core'
+        managed = False
+
+
+class TestModelsTestCase(TestCase):
+    """
+    Creates the tables of the unmanaged ``test_models`` around the test case.
+    """
+    test_models = (TrackedRecord, PartiallyTrackedRecord,)
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as schema_editor:
+            for model in cls.test_models:
+                schema_editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as schema_editor:
+            for model in cls.test_models:
+                schema_editor.delete_model(model)
+
+
+class CacheUUIDQuerySetTestCase(TestModelsTestCase):
+
+    def setUp(self):
+        TrackedRecord.objects.bulk_create([TrackedRecord(name='name %d' % (i,), notes='notes') for i in range(3)])
+        self.records = list(TrackedRecord.objects.order_by('pk'))
+
+    def test_bulk_create_gives_each_obj_a_cache_uuid(self):
+        cache_uuids = [record.cache_uuid for record in self.records]
+        self.assertTrue(all(cache_uuids))
+        self.assertEqual(len(set(cache_uuids)), 3)
+
+    def test_bulk_update_writes_fields(self):
+        for record in self.records:
+            record.notes = 'notes of %s' % (record.name,)
+        self.assertEqual(TrackedRecord.objects.bulk_update(self.records, ['notes'], batch_size=2), 3)
+
+        rows = list(TrackedRecord.objects.order_by('pk').values_list('notes', 'cache_uuid'))
+        self.assertEqual(rows, [('notes of %s' % (record.name,), record.cache_uuid,) for record in self.records])
+
+    def test_bulk_update_of_flush_fields_rotates_each_cache_uuid(self):
+        previous = [record.cache_uuid for record in self.records]
+        for record in self.records:
+            record.name = record.name.upper()
+
+        with mock.patch('core.models.invalidation_bus.publish_many') as publish_many:
+            TrackedRecord.objects.bulk_update(self.records, ['name'])
+
+        cache_uuids = list(TrackedRecord.objects.order_by('pk').values_list('cache_uuid', flat=True))
+        self.assertEqual(cache_uuids, [record.cache_uuid for record in self.records])
+        self.assertEqual(len(set(cache_uuids + previous)), 6)
+        events = publish_many.call_args[0][0]
+        self.assertEqual([(event.pk, event.old_uuid, event.new_uuid,) for event in events],
+                         [(record.pk, old_uuid, record.cache_uuid,) for record, old_uuid in zip(self.records, previous)])
+
+
+class AppendToLogTestCase(TestModelsTestCase):
+
+    def setUp(self):
+        self.record = TrackedRecord(name='name')
+        self.record.save()
+
+    def test_append_keeps_cache_uuid_unless_log_flushes_it(self):
+        cache_uuid = self.record.cache_uuid
+        self.record.append_to_log('entry', should_buffer=False)
+        self.assertEqual(TrackedRecord.objects.get(pk=self.record.pk).cache_uuid, cache_uuid)
+        self.assertIn('entry', TrackedRecord.objects.get(pk=self.record.pk).log)
+
+    @override_settings(CACHE_INVALIDATION_BUS_ENABLED=True)
+    def test_append_rotates_and_publishes_when_log_flushes_cache(self):
+        cache_uuid = self.record.cache_uuid
+        with mock.patch.object(TrackedRecord, 'flush_cache_fields', ['name', 'log']), \
+                mock.patch('core.models.invalidation_bus.publish_many') as publish_many:
+            self.record.append_to_log('entry', should_buffer=False)
+
+        self.assertNotEqual(self.record.cache_uuid, cache_uuid)
+        self.assertEqual(TrackedRecord.objects.get(pk=self.record.pk).cache_uuid, self.record.cache_uuid)
+        [event] = publish_many.call_args[0][0]
+        self.assertEqual((event.pk, event.old_uuid, event.new_uuid,), (self.record.pk, cache_uuid, self.record.cache_uuid,))
+
+    def test_unsaved_record(self):
+        with self.assertRaises(ValueError):
+            TrackedRecord(name='name').append_to_log('entry', should_buffer=False)
+
+
+class ChangedUpdateFieldsTestCase(TestModelsTestCase):
+    """
+    The ``update_fields`` handed to ``Model.save()`` by ``BaseModel.save()`` and
+    ``CacheUUIDModel.save()``, which never get to the database here.
+    """
+
+    def setUp(self):
+        self.record = TrackedRecord(pk=1, name='name', notes='notes', cache_uuid='old-uuid')
+        self.record._state.adding = False
+        patcher = mock.patch.object(models.Model, 'save', autospec=True)
+        self.model_save = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_saved_update_fields(self):
+        self.assertEqual(self.model_save.call_count, 1)
+        update_fields = self.model_save.call_args[1].get('update_fields')
+        return sorted(update_fields) if update_fields is not None else None
+
+    def test_no_changes_skip_the_save(self):
+        self.assertEqual(self.record.get_changed_update_fields(), [])
+        self.record.save()
+        self.assertFalse(self.model_save.called)
+
+    def test_only_updated_at_changed(self):
+        self.record.updated_at = timezone.now()
+        self.record.save()
+        self.assertEqual(self.get_saved_update_fields(), ['updated_at'])
+
+    def test_changed_field_adds_updated_at(self):
+        self.record.notes = 'other notes'
+        self.record.save()
+        self.assertEqual(self.get_saved_update_fields(), ['notes', 'updated_at'])
+        self.assertEqual(self.record.cache_uuid, 'old-uuid')
+
+    def test_flush_field_rotates_cache_uuid(self):
+        self.record.name = 'other name'
+        self.record.save()
+        self.assertEqual(self.get_saved_update_fields(), ['cache_uuid', 'name', 'updated_at'])
+        self.assertNotEqual(self.record.cache_uuid, 'old-uuid')
+
+    def test_partial_save_keeps_a_rotated_cache_uuid(self):
+        self.record.name = 'other name'
+        self.record.save(update_fields=['name'])
+        self.assertEqual(self.get_saved_update_fields(), ['cache_uuid', 'name'])
+        self.assertNotEqual(self.record.cache_uuid, 'old-uuid')
+
+    def test_partial_save_without_rotation(self):
+        self.record.notes = 'other notes'
+        self.record.save(update_fields=['notes'])
+        self.assertEqual(self.get_saved_update_fields(), ['notes'])
+
+    def test_unsaved_record_saves_every_field(self):
+        record = TrackedRecord(name='name')
+        self.assertIsNone(record.get_changed_update_fields())
+        record.save()
+        self.assertIsNone(self.get_saved_update_fields())
+
+    def test_untracked_fields_require_a_full_save(self):
+        record = PartiallyTrackedRecord(pk=1, name='name', notes='notes')
+        record._state.adding = False
+        record.notes = 'other notes'
+        self.assertIsNone(record.get_changed_update_fields())
+        record.save()
+        self.assertIsNone(self.get_saved_update_fields())
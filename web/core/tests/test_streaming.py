@@ -0,0 +1,39 @@
+from __future__ import unicode_literals
+import datetime
+import json
+
+# Django
+from django.db import models
+
+# Local Apps
+from core.models import BaseModel
+from core.streaming import StreamingJSONEncoder, stream_json
+from core.tests.test_models import TestModelsTestCase
+
+
+class StreamedRecord(BaseModel):
+    name = models.CharField(max_length=50, blank=True)
+    day = models.DateField(null=True)
+
+    # Keep the bookkeeping datetimes, to compare how they are rendered.
+    serialization_excludes = []
+
+    class Meta:
+        app_label = 'core'
+        managed = False
+
+
+class StreamJSONTestCase(TestModelsTestCase):
+    test_models = (StreamedRecord,)
+
+    def test_rows_match_serialize(self):
+        for i in range(3):
+            StreamedRecord.objects.create(name='name %d' % (i,), day=datetime.date(2016, 1, i + 1) if i else None)
+        records = list(StreamedRecord.objects.order_by('pk'))
+
+        streamed = json.loads(b''.join(stream_json(StreamedRecord.objects.all(), chunk_size=2)).decode('utf-8'))
+        serialized = [json.loads(StreamingJSONEncoder().encode(record.serialize(use_cache=False))) for record in records]
+        self.assertEqual(streamed, serialized)
+        self.assertEqual(streamed[1]['day'], '2016-01-02')
+        self.assertEqual(streamed[0]['day'], '')
+        self.assertRegex(streamed[0]['created_at'], r'\+00:00$')
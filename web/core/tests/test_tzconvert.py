@@ -0,0 +1,77 @@
+from __future__ import unicode_literals
+from datetime import datetime, timedelta
+from unittest import mock, skipIf
+
+# Django
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+# 3rd Party
+import pytz
+
+# Local Apps
+from core import tzconvert
+
+
+ZONES = ['America/New_York', 'Europe/London', 'Australia/Lord_Howe', 'Asia/Kolkata', 'UTC']
+
+
+def around_transitions():
+    """
+    UTC datetimes every 15 minutes around the 2021 DST transitions of ``ZONES``.
+    """
+    values = []
+    for start in [datetime(2021, 3, 13), datetime(2021, 3, 27), datetime(2021, 4, 3),
+                  datetime(2021, 10, 2), datetime(2021, 10, 30), datetime(2021, 11, 6)]:
+        values.extend(start + timedelta(minutes=15 * step) for step in range(4 * 48))
+    return [pytz.UTC.localize(value) for value in values]
+
+
+class LocalizeManyTestCase(SimpleTestCase):
+
+    def setUp(self):
+        tzconvert.get_transition_table.invalidate()
+        self.addCleanup(tzconvert.get_transition_table.invalidate)
+
+    def assertMatchesLocaltime(self, results, instants, zones):
+        self.assertEqual(len(results), len(instants))
+        for result, instant, zone in zip(results, instants, zones):
+            expected = timezone.localtime(instant, pytz.timezone(zone) if isinstance(zone, str) else zone)
+            self.assertEqual((result.replace(tzinfo=None), result.utcoffset(), result.tzname(),),
+                             (expected.replace(tzinfo=None), expected.utcoffset(), expected.tzname(),))
+
+    def check_inputs(self):
+        instants = around_transitions()
+        for zone in ZONES:
+            zones = [zone] * len(instants)
+            self.assertMatchesLocaltime(tzconvert.localize_many(instants, zone), instants, zones)
+
+            # Non-UTC and naive (taken as UTC) inputs, and epoch microseconds.
+            paris = pytz.timezone('Europe/Paris')
+            self.assertMatchesLocaltime(tzconvert.localize_many([paris.normalize(value) for value in instants], zone),
+                                        instants, zones)
+            fixed = timezone.get_fixed_timezone(-330)
+            self.assertMatchesLocaltime(tzconvert.localize_many([value.astimezone(fixed) for value in instants], zone),
+                                        instants, zones)
+            self.assertMatchesLocaltime(tzconvert.localize_many([value.replace(tzinfo=None) for value in instants], zone),
+                                        instants, zones)
+            self.assertMatchesLocaltime(tzconvert.localize_many(tzconvert.to_epoch_microseconds(instants), zone),
+                                        instants, zones)
+
+        # One zone per value, mixed.
+        zones = [ZONES[position % len(ZONES)] for position in range(len(instants))]
+        self.assertMatchesLocaltime(tzconvert.localize_many(instants, [pytz.timezone(zone) for zone in zones]),
+                                    instants, zones)
+
+    @skipIf(tzconvert.numpy is None, "NumPy isn't installed.")
+    def test_matches_localtime_with_numpy(self):
+        self.check_inputs()
+
+        instants = around_transitions()
+        array = tzconvert.numpy.array([value.replace(tzinfo=None) for value in instants], dtype='datetime64[us]')
+        self.assertMatchesLocaltime(tzconvert.localize_many(array, 'America/New_York'), instants,
+                                    ['America/New_York'] * len(instants))
+
+    def test_matches_localtime_without_numpy(self):
+        with mock.patch.object(tzconvert, 'numpy', None):
+            self.check_inputs()
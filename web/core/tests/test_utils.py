@@ -0,0 +1,45 @@
+from __future__ import unicode_literals
+import threading
+
+# Django
+from django.test import SimpleTestCase
+
+# Local Apps
+from core.utils import ThreadLocalVar
+
+
+class ThreadLocalVarTestCase(SimpleTestCase):
+
+    def test_set_and_reset(self):
+        var = ThreadLocalVar('test', default=None)
+        outer = var.set('outer')
+        inner = var.set('inner')
+        self.assertEqual(var.get(), 'inner')
+        var.reset(inner)
+        self.assertEqual(var.get(), 'outer')
+        var.reset(outer)
+        self.assertIsNone(var.get())
+
+        with self.assertRaises(ValueError):
+            var.reset(outer)
+        with self.assertRaises(ValueError):
+            ThreadLocalVar('other').reset(var.set('value'))
+
+    def test_threads_see_their_own_value(self):
+        var = ThreadLocalVar('test', default='default')
+        var.set('main')
+        token = var.set('main again')
+        seen = []
+
+        def run():
+            seen.append(var.get())
+            try:
+                var.reset(token)
+            except ValueError:
+                seen.append('refused')
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, ['default', 'refused'])
+        self.assertEqual(var.get(), 'main again')
@@ -0,0 +1,243 @@
+from __future__ import unicode_literals
+import bisect
+from datetime import datetime, timedelta
+
+# Django
+from django.utils import timezone
+
+# 3rd Party
+import pytz
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Local Apps
+from core.decorators import PROCESS, memoize
+
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = EPOCH.replace(tzinfo=pytz.UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class TransitionTable(object):
+    """
+    UTC offsets of one timezone, precomputed from its pytz transition data.
+
+    ``starts[i]`` is the UTC instant, in microseconds since the epoch, from which
+    ``offsets[i]`` (microseconds) and ``tzinfos[i]`` (the pytz ``tzinfo`` that
+    ``normalize()`` would attach) apply, until ``starts[i + 1]``.
+    """
+
+    def __init__(self, starts, offsets, tzinfos):
+        self.starts = starts
+        self.offsets = offsets
+        self.tzinfos = tzinfos
+        if numpy is not None:
+            self.starts_array = numpy.array(starts, dtype='int64')
+            self.offsets_array = numpy.array(offsets, dtype='int64')
+
+    def indexes(self, epochs_us):
+        """
+        Returns the transition index in effect at each of ``epochs_us``.
+        """
+        if numpy is not None:
+            return numpy.searchsorted(self.starts_array, epochs_us, side='right') - 1
+        return [bisect.bisect_right(self.starts, epoch_us) - 1 for epoch_us in epochs_us]
+
+
+def to_microseconds(delta):
+    return delta // _MICROSECOND
+
+
+# Start of the single entry of fixed-offset tables, matching pytz's first transition.
+_FIRST_START = to_microseconds(datetime.min - EPOCH)
+
+
+def get_zone_name(tz):
+    """
+    Returns the pytz name of ``tz`` (a ``tzinfo`` or a name), or ``None`` for
+    ``tzinfo`` objects that aren't pytz zones.
+    """
+    if isinstance(tz, str):
+        return tz
+    return getattr(tz, 'zone', None)
+
+
+@memoize(scope=PROCESS, maxsize=512)
+def get_transition_table(zone_name):
+    tz = pytz.timezone(zone_name)
+    if not hasattr(tz, '_utc_transition_times'):
+        # UTC and zones that never changed offset.
+        return get_fixed_table(tz)
+
+    starts = []
+    offsets = []
+    tzinfos = []
+    for utc_start, info in zip(tz._utc_transition_times, tz._transition_info):
+        # The first transition is at datetime.min, which still fits in an int64.
+        starts.append(to_microseconds(utc_start - EPOCH))
+        offsets.append(to_microseconds(info[0]))
+        tzinfos.append(tz._tzinfos[info])
+    return TransitionTable(starts, offsets, tzinfos)
+
+
+def get_fixed_table(tz):
+    """
+    ``TransitionTable`` for a ``tzinfo`` that isn't a pytz zone, assumed to have a
+    fixed offset (e.g. ``django.utils.timezone.FixedOffset``).
+    """
+    return TransitionTable([_FIRST_START], [to_microseconds(tz.utcoffset(None) or timedelta(0))], [tz])
+
+
+def get_table(tz):
+    zone_name = get_zone_name(tz)
+    if zone_name:
+        return get_transition_table(zone_name)
+    return get_fixed_table(tz)
+
+
+def to_epoch_microseconds(values):
+    """
+    Converts ``values`` to microseconds since the epoch. Naive datetimes are taken
+    to be in UTC; a NumPy ``datetime64`` array is converted without a Python loop.
+    """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype.kind == 'M':
+            return values.astype('datetime64[us]').astype('int64')
+        return values.astype('int64')
+
+    # Subtracting aware datetimes accounts for their offsets, with no conversion.
+    return [(value - (EPOCH if value.tzinfo is None else EPOCH_UTC)) // _MICROSECOND for value in values]
+
+
+def local_offsets(epochs_us, tz):
+    """
+    Returns ``(offsets_us, tzinfos,)``: the UTC offset in effect in ``tz`` at each of
+    ``epochs_us``, and the matching pytz ``tzinfo`` objects.
+    """
+    table = get_table(tz)
+    indexes = table.indexes(epochs_us)
+    if numpy is not None:
+        return table.offsets_array[indexes], [table.tzinfos[i] for i in indexes.tolist()]
+    return [table.offsets[i] for i in indexes], [table.tzinfos[i] for i in indexes]
+
+
+def is_zone_sequence(zones):
+    return zones is not None and not isinstance(zones, str) and hasattr(zones, '__iter__')
+
+
+def group_by_zone(count, zones):
+    """
+    Returns ``{zone: [positions]}`` for ``zones``, either one zone for all ``count``
+    values or one zone per value. Zones missing from the sequence are UTC.
+    """
+    if not is_zone_sequence(zones):
+        return {zones or timezone.get_current_timezone(): list(range(count))}
+
+    # pytz zones are singletons, so grouping by object is grouping by zone.
+    groups = {}
+    for position, zone in enumerate(zones):
+        groups.setdefault(zone or pytz.UTC, []).append(position)
+    return groups
+
+
+def localize_many(values, zones=None):
+    """
+    Converts a sequence of UTC datetimes (aware or naive), epoch microseconds or a
+    NumPy ``datetime64`` array to aware local datetimes, as ``timezone.localtime()``
+    would for each.
+
+    All values sharing a zone are converted in one pass against that zone's
+    precomputed transition table, vectorized when NumPy is installed.
+
+    Arguments:
+    values    {iterable}              The instants to convert
+    zones     {tzinfo|str|iterable}   OPTIONAL. One zone for every value, or one per
+                                      value. Defaults to the current timezone.
+    """
+    if numpy is None or not isinstance(values, numpy.ndarray):
+        values = list(values)
+        is_epochs = bool(values) and isinstance(values[0], int)
+    else:
+        is_epochs = values.dtype.kind != 'M'
+    epochs_us = to_epoch_microseconds(values) if not is_epochs else values
+
+    results = [None] * len(epochs_us)
+    for zone, positions in group_by_zone(len(epochs_us), zones).items():
+        if numpy is not None:
+            zone_epochs = numpy.asarray(epochs_us, dtype='int64')[positions]
+            offsets, tzinfos = local_offsets(zone_epochs, zone)
+            local = (zone_epochs + offsets).astype('datetime64[us]').tolist()
+        else:
+            zone_epochs = [epochs_us[position] for position in positions]
+            offsets, tzinfos = local_offsets(zone_epochs, zone)
+            local = [EPOCH + timedelta(microseconds=epoch + offset) for epoch, offset in zip(zone_epochs, offsets)]
+
+        for position, naive, tzinfo in zip(positions, local, tzinfos):
+            results[position] = naive.replace(tzinfo=tzinfo)
+    return results
+
+
+def to_local_datetime64(values, zones=None):
+    """
+    Like ``localize_many()``, but returns the local wall-clock times as a naive NumPy
+    ``datetime64[us]`` array, so no Python object is built per value. Suited to
+    bucketing or aggregating large reports by local day or hour. Requires NumPy.
+    """
+    assert numpy is not None, "to_local_datetime64() requires NumPy."
+
+    if not isinstance(values, numpy.ndarray):
+        values = list(values)
+        if values and not isinstance(values[0], int):
+            values = to_epoch_microseconds(values)
+        values = numpy.array(values, dtype='int64')
+    epochs_us = to_epoch_microseconds(values)
+
+    local = numpy.empty(len(epochs_us), dtype='int64')
+    for zone, positions in group_by_zone(len(epochs_us), zones).items():
+        table = get_table(zone)
+        zone_epochs = epochs_us[positions]
+        local[positions] = zone_epochs + table.offsets_array[table.indexes(zone_epochs)]
+    return local.astype('datetime64[us]')
+
+
+def annotate_localtimes(objs, field_name, zones=None, attr=None):
+    """
+    Sets ``<field_name>_local`` (or ``attr``) on every obj to its ``field_name``
+    datetime converted with ``localize_many()``, and returns the objs as a list.
+    Meant for querysets of report rows, e.g.:
+
+        rows = annotate_localtimes(Order.objects.select_related('user'), 'created_at',
+                                   zones=lambda order: order.user.get_timezone())
+
+    Arguments:
+    objs          {iterable}                       The records, typically a queryset
+    field_name    {string}                         Datetime attribute to convert
+    zones         {tzinfo|str|callable|iterable}   OPTIONAL. One zone for all objs, a
+                                                   callable returning each obj's zone,
+                                                   or one zone per obj. Defaults to
+                                                   the current timezone.
+    attr          {string}                         OPTIONAL. Attribute set on each obj
+    """
+    objs = list(objs)
+    attr = attr or '%s_local' % (field_name,)
+    if callable(zones):
+        zones = [zones(obj) for obj in objs]
+    elif is_zone_sequence(zones):
+        zones = list(zones)
+
+    present = []
+    present_zones = [] if is_zone_sequence(zones) else zones
+    for position, obj in enumerate(objs):
+        setattr(obj, attr, None)
+        if getattr(obj, field_name) is not None:
+            present.append(obj)
+            if is_zone_sequence(zones):
+                present_zones.append(zones[position])
+
+    values = localize_many([getattr(obj, field_name) for obj in present], present_zones)
+    for obj, value in zip(present, values):
+        setattr(obj, attr, value)
+    return objs
@@ -2,7 +2,11 @@
 from django.conf.urls import include, url
 from django.contrib import admin
 
+# Local Apps
+from core.views import timings
+
 urlpatterns = [
     url(r'^', include("users.urls")),
     url(r'^admin/', include(admin.site.urls)),
+    url(r'^_timings/$', timings, name="timings"),
 ]
@@ -1,23 +1,101 @@
+import bisect
 import datetime
+import importlib
 import logging
 import re
-import requests as _requests
 import socket
-import termcolor
+import threading
 import time
+from collections import OrderedDict
+from urllib.parse import urlparse
 
 # Django
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 
 # 3rd Party
+# ``requests`` and ``termcolor`` are imported on first use, keeping them out of
+# worker boot. See ``core.warmup`` to load them before forking instead.
+
+
+class _ContextVarToken(object):
+    __slots__ = ('var', 'thread_id', 'old_value', 'used',)
+
+    def __init__(self, var, old_value):
+        self.var = var
+        self.thread_id = threading.get_ident()
+        self.old_value = old_value
+        self.used = False
+
+
+class ThreadLocalVar(object):
+    """
+    Stand-in for ``contextvars.ContextVar`` on Python < 3.7, scoped to the current
+    thread: ``get()``, ``set()`` returning a token, and ``reset(token)``, which
+    raises ``ValueError`` for a token from another thread, var, or already used.
+    Enough for threaded WSGI servers, the only kind Django 1.9 runs under.
+    """
+
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+        self._local = threading.local()
+
+    def get(self):
+        return getattr(self._local, 'value', self.default)
+
+    def set(self, value):
+        token = _ContextVarToken(self, self.get())
+        self._local.value = value
+        return token
+
+    def reset(self, token):
+        if token.var is not self or token.used or token.thread_id != threading.get_ident():
+            raise ValueError("%r was created by another thread or var, or already used." % (token,))
+        token.used = True
+        self._local.value = token.old_value
+
+
 try:
-    from termcolor import _cprint
-except ImportError:
-    def _cprint(msg, *args, **kwargs):
+    from contextvars import ContextVar
+except ImportError:  # Python < 3.7
+    ContextVar = ThreadLocalVar
+
+
+_lazy_modules = {}
+
+
+def import_lazily(name):
+    """
+    Imports module ``name`` on first call and returns it, or ``None`` if it isn't
+    installed. Meant for heavy or dev-only dependencies that most processes, or
+    most requests, never need.
+    """
+    try:
+        return _lazy_modules[name]
+    except KeyError:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            module = None
+        _lazy_modules[name] = module
+        return module
+
+
+def _cprint(msg, *args, **kwargs):
+    termcolor = import_lazily('termcolor')
+    if termcolor is not None and hasattr(termcolor, '_cprint'):
+        termcolor._cprint(msg, *args, **kwargs)
+    else:
         print(msg)
 
 
+def colored(text, color=None):
+    termcolor = import_lazily('termcolor')
+    return termcolor.colored(text, color=color) if termcolor is not None else text
+
+
 def cprint(msg, *args, **kwargs):
     if settings.TESTING:
         return
@@ -42,7 +120,128 @@ def site_url(uri='', subdomain=''):
         return '%s://%s%s:%s%s' % (settings.SITE_PROTOCOL, subdomain, settings.SITE_HOST, settings.SITE_PORT, uri,)
 
 
+class LatencyHistogram(object):
+    """
+    Thread-safe, fixed-bucket latency histogram in milliseconds. Recording is a
+    bisect and a few increments; percentiles are approximated by the upper bound
+    of the bucket they fall in (capped at the largest value seen).
+    """
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 75, 100, 150, 250, 500, 750, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def record(self, ms):
+        index = bisect.bisect_left(self.BUCKETS_MS, ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def percentile(self, percent):
+        with self._lock:
+            return self._percentile(percent)
+
+    def _percentile(self, percent):
+        if not self.count:
+            return 0.0
+
+        threshold = self.count * percent / 100.0
+        running = 0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= threshold and index < len(self.BUCKETS_MS):
+                return min(float(self.BUCKETS_MS[index]), self.max_ms)
+        return self.max_ms
+
+    def snapshot(self, should_reset=False):
+        """
+        Returns the aggregates, read under the lock so they are consistent. With
+        ``should_reset`` the histogram is cleared in the same step, so every record
+        lands in exactly one snapshot.
+        """
+        with self._lock:
+            snapshot = {
+                'count': self.count,
+                'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+                'max_ms': round(self.max_ms, 3),
+                'p50_ms': round(self._percentile(50), 3),
+                'p95_ms': round(self._percentile(95), 3),
+                'p99_ms': round(self._percentile(99), 3),
+            }
+            if should_reset:
+                self._clear()
+        return snapshot
+
+
+class HistogramRegistry(object):
+    """
+    A collection of ``LatencyHistogram`` objects labeled by name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def get(self, label):
+        try:
+            return self._histograms[label]
+        except KeyError:
+            with self._lock:
+                return self._histograms.setdefault(label, LatencyHistogram())
+
+    def record(self, label, ms):
+        self.get(label).record(ms)
+
+    def snapshot(self, should_reset=False):
+        """
+        Returns ``{label: aggregates}``. With ``should_reset`` each histogram is
+        cleared as it is read (see ``LatencyHistogram.snapshot()``) and labels that
+        recorded nothing since the last reset are left out. Histograms are kept,
+        never swapped, so a recorder already holding one can't write to a dropped copy.
+        """
+        with self._lock:
+            histograms = list(self._histograms.items())
+
+        snapshot = {}
+        for label, histogram in histograms:
+            histogram_snapshot = histogram.snapshot(should_reset=should_reset)
+            if histogram_snapshot['count'] or not should_reset:
+                snapshot[label] = histogram_snapshot
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
 class requests(object):
+    """
+    Thin wrapper around the ``requests`` library. Calls are made through one pooled,
+    keep-alive ``Session`` per scheme and host, with a default timeout and retries
+    with backoff for idempotent methods. Per-host latencies are recorded into
+    ``requests.latency``.
+
+    Tuned through the ``HTTP_CLIENT_*`` settings.
+    """
+    IDEMPOTENT_METHODS = frozenset(['HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'])
+
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+    latency = HistogramRegistry()
 
     @staticmethod
     def get(*args, **kwargs):
@@ -70,37 +269,179 @@ class requests(object):
         # Option for doing stuff here. Deletes are crazy -- super log them?
         return requests._requests(*args, **kwargs)
 
+    @staticmethod
+    def fan_out(specs, max_workers=None, timeout=None):
+        """
+        Runs several calls concurrently on a bounded thread pool, returning one
+        ``FanOutResult`` per spec, in the same order as ``specs``. A failed or
+        timed out call is reported on its result rather than raised, so one bad
+        endpoint never stops the batch.
+
+        Arguments:
+        specs          {list}    Dicts with a ``url``, an optional ``method`` (defaults
+                                 to ``get``) and any other kwargs for that call.
+        max_workers    {int}     OPTIONAL. Defaults to ``HTTP_CLIENT_FAN_OUT_MAX_WORKERS``.
+        timeout        {float}   OPTIONAL. Seconds to wait for the whole batch. Calls still
+                                 running after that come back with a ``TimeoutError``.
+
+        Usage:
+            weather, news = requests.fan_out([
+                {'url': 'https://weather.example.com/today'},
+                {'url': 'https://news.example.com/top', 'params': {'limit': 5}},
+            ])
+            if weather.ok:
+                weather.response.json()
+        """
+        specs = list(specs)
+        if not specs:
+            return []
+
+        # Imported here, as most processes never fan out.
+        from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+
+        max_workers = max_workers or getattr(settings, 'HTTP_CLIENT_FAN_OUT_MAX_WORKERS', 8)
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(specs)))
+        try:
+            futures = [executor.submit(requests._fan_out_call, spec) for spec in specs]
+            futures_wait(futures, timeout=timeout)
+
+            results = []
+            for spec, future in zip(specs, futures):
+                if future.done():
+                    results.append(future.result())
+                else:
+                    future.cancel()
+                    results.append(FanOutResult(spec, error=TimeoutError('Fan-out batch timed out')))
+            return results
+        finally:
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _fan_out_call(spec):
+        kwargs = dict(spec)
+        url = kwargs.pop('url')
+        kwargs.setdefault('method', 'get')
+
+        st = time.time()
+        try:
+            resp = requests._requests(url, **kwargs)
+        except Exception as e:
+            return FanOutResult(spec, error=e, elapsed_ms=(time.time() - st) * 1000)
+        return FanOutResult(spec, response=resp, elapsed_ms=(time.time() - st) * 1000)
+
+    @staticmethod
+    def get_host_key(url):
+        parsed = urlparse(url)
+        return '%s://%s' % (parsed.scheme, parsed.netloc,)
+
+    @staticmethod
+    def get_session(url):
+        """
+        Returns the pooled ``Session`` for the host of ``url``, creating it if needed.
+        """
+        host_key = requests.get_host_key(url)
+        try:
+            return requests._sessions[host_key]
+        except KeyError:
+            with requests._sessions_lock:
+                if host_key not in requests._sessions:
+                    requests._sessions[host_key] = requests._build_session()
+                return requests._sessions[host_key]
+
+    @staticmethod
+    def _build_session():
+        import requests as _requests
+        from requests.adapters import HTTPAdapter
+        from requests.packages.urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=getattr(settings, 'HTTP_CLIENT_MAX_RETRIES', 2),
+            backoff_factor=getattr(settings, 'HTTP_CLIENT_BACKOFF_FACTOR', 0.2),
+            method_whitelist=requests.IDEMPOTENT_METHODS,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=getattr(settings, 'HTTP_CLIENT_POOL_MAXSIZE', 10),
+            pool_block=getattr(settings, 'HTTP_CLIENT_POOL_BLOCK', False),
+            max_retries=retry,
+        )
+        session = _requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @staticmethod
+    def close_sessions():
+        """
+        Closes every pooled connection. Useful after forking or in tests.
+        """
+        with requests._sessions_lock:
+            sessions, requests._sessions = requests._sessions, {}
+        for session in sessions.values():
+            session.close()
+
     @staticmethod
     def _requests(*args, **kwargs):
+        import requests as _requests
+
         method = kwargs.pop('method', 'get')
-        _method = getattr(_requests, method)
+        kwargs.setdefault('timeout', getattr(settings, 'HTTP_CLIENT_TIMEOUT', 10))
 
         url = args[0]
+        host_key = requests.get_host_key(url)
+        _method = getattr(requests.get_session(url), method)
 
         # Let's log this for now; if the traffic gets high we can turn it down.
         logger = logging.getLogger('core.utils.requests._requests')
         logger.debug('Beginning %s to %s' % (method, url,))
 
         if settings.DEBUG or settings.TESTING:
-            print_stmt = '%s %s' % (termcolor.colored(method.upper(), color='green'), url,)
+            print_stmt = '%s %s' % (colored(method.upper(), color='green'), url,)
 
         st = time.time()
         try:
             resp = _method(*args, **kwargs)
         except _requests.exceptions.Timeout:
-            error_time_ms = '%.3f' % ((time.time() - st) * 1000)
-            logger.error('%s %s TIMED OUT after %s ms' % (method.upper(), url, error_time_ms,))
+            error_time_ms = (time.time() - st) * 1000
+            requests.latency.record(host_key, error_time_ms)
+            add_request_phase_time('http', error_time_ms)
+            logger.error('%s %s TIMED OUT after %.3f ms' % (method.upper(), url, error_time_ms,))
             raise
 
-        resp_time = '%.3f' % ((time.time() - st) * 1000)
+        resp_time_ms = (time.time() - st) * 1000
+        requests.latency.record(host_key, resp_time_ms)
+        add_request_phase_time('http', resp_time_ms)
+
+        resp_time = '%.3f' % (resp_time_ms,)
         if settings.DEBUG or settings.TESTING:
-            print('%s -- Responded in {} ms'.format(print_stmt, colored_resp_time(resp_time),))
+            print('{} -- Responded in {} ms'.format(print_stmt, colored_resp_time(resp_time),))
 
         logger.debug('%s %s -- Took %s ms', method.upper(), url, resp_time,)
 
         return resp
 
 
+class FanOutResult(object):
+    """
+    Outcome of one call made through ``requests.fan_out()``. Exactly one of
+    ``response`` and ``error`` is set.
+    """
+
+    def __init__(self, spec, response=None, error=None, elapsed_ms=None):
+        self.spec = spec
+        self.response = response
+        self.error = error
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        outcome = self.response.status_code if self.ok else repr(self.error)
+        return '<FanOutResult %s %s: %s>' % (self.spec.get('method', 'get').upper(), self.spec.get('url'), outcome,)
+
+
 def colored_resp_time(resp_time):
     """
     For stdout (either management commands or the dev server). Colors the
@@ -116,7 +457,7 @@ def colored_resp_time(resp_time):
         color = 'yellow'
     else:
         color = 'red'
-    return termcolor.colored(resp_time, color=color)
+    return colored(resp_time, color=color)
 
 
 class RFC5424Filter(logging.Filter):
@@ -154,40 +495,214 @@ class RFC5424Filter(logging.Filter):
         return True
 
 
-def smoosh_args(*args, **kwargs):
-    key_suffix = ''
-    prepared_args = []
-    prepared_kwargs = []
-    for arg in args:
-        prepared_args.append(str(arg))
+_KWARGS_MARK = object()
+_MISSING = object()
+
+
+def make_memoize_key(args, kwargs):
+    """
+    Builds a hashable cache key out of call arguments. Each value keeps its type, so
+    ``1``, ``"1"`` and ``True`` never collide. Lists, tuples, dicts and sets are keyed
+    on their contents, with dicts and sets in sorted order so that equal ones give
+    the same key, pickled or not, in every process.
+
+    Raises ``TypeError`` for any other unhashable value, which can't be keyed safely.
+    """
+    key = tuple(_freeze(arg) for arg in args)
+    if kwargs:
+        key += (_KWARGS_MARK,) + tuple(sorted((name, _freeze(value),) for name, value in kwargs.items()))
+    return key
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(item) for item in value),)
+    if isinstance(value, dict):
+        return (type(value), _sorted((_freeze(key), _freeze(item),) for key, item in value.items()),)
+    if isinstance(value, (set, frozenset)):
+        return (type(value), _sorted(_freeze(item) for item in value),)
+
+    hash(value)  # Raises TypeError for unhashable values.
+    return (type(value), value,)
+
 
-    for key, value in kwargs.items():
-        prepared_kwargs.append('%s=%s' % (key, str(value),))
+def _sorted(items):
+    items = list(items)
+    try:
+        return tuple(sorted(items))
+    except TypeError:
+        # Mixed types don't compare; their reprs (type included) still give a stable order.
+        return tuple(sorted(items, key=repr))
 
-    all_prepared_args = prepared_args + prepared_kwargs
-    if all_prepared_args:
-        key_suffix = ';'.join(all_prepared_args)
 
-    return key_suffix
+class LRUCache(object):
+    """
+    Thread-safe, in-process mapping that evicts its least recently used entry once
+    it holds ``maxsize`` entries, and optionally expires entries ``ttl`` seconds
+    after they were set. ``None`` for either means unbounded.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Locks can't be pickled; cached values travel, the lock is rebuilt.
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, should_count=False) is not _MISSING
+
+    def get(self, key, default=None, should_count=True):
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                if should_count:
+                    self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                if should_count:
+                    self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            if should_count:
+                self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at,)
+            self._data.move_to_end(key)
+            while self.maxsize and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def delete_matching(self, predicate):
+        """
+        Deletes every entry whose key satisfies ``predicate``. Linear in the size
+        of the cache, so meant for small caches and rare events.
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'maxsize': self.maxsize,
+            'currsize': len(self._data),
+        }
 
 
 class ContentTypeRepo(object):
+    """
+    Process-wide registry of every ContentType with O(1) lookups by id, by model
+    class and by ``(app_label, model)``.
+
+    The registry fills itself lazily on the first lookup and is invalidated on
+    ``post_migrate`` (see ``core.apps``). When ``CONTENT_TYPE_REPO_CACHE_ALIAS`` names
+    a cache backend, the rows are shared through it so that each worker process
+    does not have to query for them itself.
+    """
     _instance = None
-    ct_map = {}
+    _lock = threading.Lock()
+    cache_key = 'core:content_type_repo'
 
     def __new__(cls, *args, **kwargs):
         """
         Singleton implementation
         """
         if not cls._instance:
-            cls._instance = super(ContentTypeRepo, cls).__new__(cls, *args, **kwargs)
-            cls._instance.seed_ct_map()
+            with cls._lock:
+                if not cls._instance:
+                    instance = super(ContentTypeRepo, cls).__new__(cls, *args, **kwargs)
+                    instance._set_maps({}, {}, [])
+                    instance.is_loaded = False
+                    cls._instance = instance
         return cls._instance
 
-    def seed_ct_map(self):
-        self.ct_map = {}
-        for ct in ContentType.objects.all():
-            self._instance.ct_map[ct.pk] = ct
+    @property
+    def backend(self):
+        alias = getattr(settings, 'CONTENT_TYPE_REPO_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    @property
+    def ct_map(self):
+        self.ensure_loaded()
+        return self._ct_map
+
+    def ensure_loaded(self):
+        if not self.is_loaded:
+            with self._lock:
+                if not self.is_loaded:
+                    self.seed_ct_map()
+
+    def seed_ct_map(self, use_shared=True):
+        """
+        Loads all ContentTypes, preferring the shared cache backend when configured.
+        """
+        backend = self.backend
+        rows = backend.get(self.cache_key) if (use_shared and backend is not None) else None
+        if rows is None:
+            rows = list(ContentType.objects.values_list('pk', 'app_label', 'model'))
+            if backend is not None:
+                backend.set(self.cache_key, rows, None)
+
+        ct_map = {}
+        ct_by_natural_key = {}
+        valid = []
+        for pk, app_label, model in rows:
+            ct = ContentType(pk=pk, app_label=app_label, model=model)
+            ct._state.adding = False
+            ct_map[pk] = ct
+            ct_by_natural_key[(app_label, model)] = ct
+            if ct.model_class() is not None:
+                valid.append(ct)
+
+        self._set_maps(ct_map, ct_by_natural_key, valid)
+        self.is_loaded = True
+
+    def _set_maps(self, ct_map, ct_by_natural_key, valid):
+        # Swapped in together so concurrent readers never see a half-built registry.
+        self._ct_map, self._ct_by_natural_key, self._valid = ct_map, ct_by_natural_key, valid
+
+    def invalidate(self, should_clear_shared=True):
+        """
+        Drops the registry; it is rebuilt on the next lookup.
+        """
+        self.is_loaded = False
+        backend = self.backend
+        if should_clear_shared and backend is not None:
+            backend.delete(self.cache_key)
 
     def get_content_type_by_id(self, id):
         return self.ct_map[id]
@@ -195,12 +710,91 @@ class ContentTypeRepo(object):
     def get_class_by_id(self, id):
         return self.get_content_type_by_id(id).model_class()
 
+    def get_content_type(self, app_label, model):
+        self.ensure_loaded()
+        return self._ct_by_natural_key[(app_label, model)]
+
+    def get_for_model(self, model):
+        """
+        Mirrors ``ContentType.objects.get_for_model()`` (concrete models only),
+        falling back to it, and remembering the result, for unknown models.
+        """
+        opts = model._meta.concrete_model._meta
+        try:
+            return self.get_content_type(opts.app_label, opts.model_name)
+        except KeyError:
+            pass
+
+        ct = ContentType.objects.get_for_model(model)
+        self._ct_map[ct.pk] = ct
+        self._ct_by_natural_key[(ct.app_label, ct.model)] = ct
+        self._valid.append(ct)
+        return ct
+
+    def valid_content_types(self):
+        self.ensure_loaded()
+        return self._valid
+
+
+_request_cache = ContextVar('core_request_cache', default=None)
+
+
+def get_request_cache():
+    """
+    Returns the ``LRUCache`` of the request being handled in the current thread or
+    task, or ``None`` outside of one (or without ``core.middleware.RequestCache``).
+    """
+    return _request_cache.get()
+
+
+def start_request_cache():
+    """
+    Installs a fresh request cache and returns the token ``end_request_cache()`` needs.
+    """
+    return _request_cache.set(LRUCache(maxsize=getattr(settings, 'REQUEST_CACHE_MAXSIZE', None)))
+
+
+def end_request_cache(token):
+    try:
+        _request_cache.reset(token)
+    except ValueError:
+        # Token created in another context (e.g. an ASGI hop); just drop the cache.
+        _request_cache.set(None)
+
+
+_request_phases = ContextVar('core_request_phases', default=None)
+
+
+def start_request_phases():
+    """
+    Starts accumulating phase timings (see ``add_request_phase_time()``) for the
+    current request. Returns the token ``end_request_phases()`` needs.
+    """
+    return _request_phases.set({})
+
+
+def end_request_phases(token):
+    phases = _request_phases.get()
+    try:
+        _request_phases.reset(token)
+    except ValueError:
+        _request_phases.set(None)
+    return phases or {}
+
+
+def add_request_phase_time(phase, ms):
+    """
+    Adds ``ms`` to the ``phase`` (e.g. ``db``, ``http``) of the current request, if
+    one is being timed by ``core.middleware.TimeRequests``.
+    """
+    phases = _request_phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + ms
+
 
 def valid_content_types():
     """
-    Returns an iterator of only valid content types, using the ContentType
-    lookup singleton above.
+    Returns the precomputed list of content types whose model class exists,
+    using the ContentType lookup singleton above.
     """
-    for pk, ct in ContentTypeRepo().ct_map.items():
-        if bool(ct.model_class()):
-            yield ct
+    return ContentTypeRepo().valid_content_types()
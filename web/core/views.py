@@ -0,0 +1,22 @@
+from __future__ import unicode_literals
+
+# Django
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+# Local Apps
+from core.profiling import route_latency, timings as stopwatch_timings, worst_query_requests
+from core.utils import requests
+
+
+@staff_member_required
+def timings(request):
+    """
+    Staff-only dump of this worker process's in-memory latency aggregates.
+    """
+    return JsonResponse({
+        'routes': route_latency.snapshot(),
+        'stopwatch': stopwatch_timings.snapshot(),
+        'outbound_http': requests.latency.snapshot(),
+        'worst_query_requests': worst_query_requests.snapshot(),
+    })
@@ -0,0 +1,113 @@
+from __future__ import unicode_literals
+import gc
+import importlib
+import logging
+import time
+from collections import OrderedDict
+
+# Django
+from django.conf import settings
+from django.contrib import admin
+from django.core.urlresolvers import get_resolver
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+
+# Local Apps
+from core.utils import ContentTypeRepo, requests
+from core.widgets import CachedTimezoneSelect
+
+
+logger = logging.getLogger('core.warmup')
+
+
+def warmup():
+    """
+    Does ahead of time what the first requests of a worker would otherwise do:
+    imports the lazily imported ``WARMUP_IMPORTS``, builds the URL resolver's
+    reverse lookup tables (admin URLs included), compiles ``WARMUP_TEMPLATES``
+    (kept only with the cached template loader) and renders the timezone
+    ``<select>`` options.
+
+    Called from ``core.wsgi`` when ``WARMUP_ON_BOOT`` is set. Under a preforking
+    server that loads the app before forking (e.g. ``gunicorn --preload``) the
+    work is done once, in the master, and workers start warm. Nothing here opens a
+    database connection, as those must not cross a fork.
+
+    Returns the milliseconds spent per step.
+    """
+    steps = OrderedDict()
+
+    start = time.perf_counter()
+    for name in getattr(settings, 'WARMUP_IMPORTS', ()):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.warning("Could not import %s during warmup.", name)
+    steps['imports'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    get_resolver(None).reverse_dict
+    steps['urls'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for name in getattr(settings, 'WARMUP_TEMPLATES', ()):
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            logger.warning("Could not load template %s during warmup.", name)
+    steps['templates'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    warm_timezone_choices()
+    steps['timezone_choices'] = (time.perf_counter() - start) * 1000
+
+    log_steps("Warmed up", steps)
+    return steps
+
+
+def warm_timezone_choices():
+    for is_required in (False, True,):
+        widget = CachedTimezoneSelect()
+        widget.is_required = is_required
+        widget.get_options_html()
+
+
+def prepare_for_fork():
+    """
+    ``warmup()``, plus the caches that need the database: the ``ContentTypeRepo``,
+    including the content types of every model registered with the admin.
+    Database connections are then closed and every object allocated so far is
+    moved out of the garbage collector's reach with ``gc.freeze()``. Collections
+    in the forked workers then never touch those objects, so their memory pages
+    stay shared copy-on-write. ``gc.freeze()`` is Python 3.7+; before that the
+    collection still runs, but workers' collections will touch shared pages.
+
+    Only call this in a process about to fork workers, see ``core.wsgi_prefork``.
+    """
+    steps = warmup()
+
+    start = time.perf_counter()
+    repo = ContentTypeRepo()
+    repo.ensure_loaded()
+    for model in admin.site._registry:
+        repo.get_for_model(model)
+    steps['content_types'] = (time.perf_counter() - start) * 1000
+
+    # Nothing holding a socket may be shared with the workers.
+    connections.close_all()
+    requests.close_sessions()
+
+    start = time.perf_counter()
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    steps['freeze'] = (time.perf_counter() - start) * 1000
+
+    log_steps("Prepared for fork", steps)
+    return steps
+
+
+def log_steps(message, steps):
+    logger.info("%s in %.1f ms (%s).", message, sum(steps.values()),
+                ', '.join('%s %.1f ms' % (step, ms,) for step, ms in steps.items()))
@@ -1,10 +1,18 @@
 from __future__ import unicode_literals
 
 # Django
+from django import forms
 from django.core.urlresolvers import reverse, NoReverseMatch
 from django.contrib.admin.widgets import AdminFileWidget, \
     ManyToManyRawIdWidget, ForeignKeyRawIdWidget
-from django.utils.html import escape
+from django.db.models.fields import BLANK_CHOICE_DASH
+from django.forms.utils import flatatt
+from django.utils.encoding import force_text
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+# Local Apps
+from .models import get_timezone_choices
 
 
 # Via: https://gist.github.com/EmilStenstrom/4761449
@@ -22,3 +30,30 @@ class VerboseForeignKeyRawIdWidget(ForeignKeyRawIdWidget):
             return '???'
         except NoReverseMatch:
             return super(VerboseForeignKeyRawIdWidget, self).label_for_value(value)
+
+
+class CachedTimezoneSelect(forms.Select):
+    """
+    ``<select>`` of ``get_timezone_choices()`` for ``TimeZoneField``s. The few
+    hundred ``<option>`` tags are rendered once per process; each render after that
+    only marks the selected option.
+
+    Any ``choices`` handed over by the form field are ignored.
+    """
+    _options_html = {}
+
+    def get_options_html(self):
+        include_blank = not self.is_required
+        html = self._options_html.get(include_blank)
+        if html is None:
+            choices = (BLANK_CHOICE_DASH if include_blank else []) + list(get_timezone_choices())
+            html = '\n'.join(self.render_option(set(), value, label) for value, label in choices)
+            self._options_html[include_blank] = html
+        return html
+
+    def render(self, name, value, attrs=None, choices=()):
+        option = format_html('<option value="{}">', force_text(value if value is not None else ''))
+        options = self.get_options_html().replace(option, option[:-1] + ' selected="selected">', 1)
+
+        final_attrs = self.build_attrs(attrs, name=name)
+        return mark_safe('\n'.join([format_html('<select{}>', flatatt(final_attrs)), options, '</select>']))
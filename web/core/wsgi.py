@@ -10,5 +10,10 @@ https://docs.djangoproject.com/en/1.7/howto/deployment/wsgi/
 import os
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.local")
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+if getattr(settings, 'WARMUP_ON_BOOT', False):
+    from core.warmup import warmup
+    warmup()
@@ -0,0 +1,23 @@
+"""
+WSGI entry point for preforking servers that load the application before forking
+their workers, e.g.:
+
+    gunicorn core.wsgi_prefork:application --preload --workers 4
+
+The master process warms up everything workers would otherwise pay for on their
+first request, then freezes it with ``gc.freeze()`` so the memory stays shared
+copy-on-write across workers. See ``core.warmup.prepare_for_fork()``.
+
+Without ``--preload`` every worker imports this module itself: each one warms up
+before serving, but nothing is shared. Defaults to the production settings, since
+it's only meant for servers running them.
+"""
+
+import os
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.production")
+
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+
+from core.warmup import prepare_for_fork
+prepare_for_fork()
@@ -8,6 +8,7 @@ from django.utils.translation import ugettext_lazy as _
 
 # Local Apps
 from core.admin import BaseModelAdmin
+from core.middleware import forget_timezone
 from users.models import User
 
 
@@ -28,4 +29,10 @@ class UserAdmin(BaseUserAdmin, BaseModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        super(UserAdmin, self).save_model(request, obj, form, change)
+        if change and 'timezone' in form.changed_data:
+            # Voids the timezone cookies of the edited user's sessions, this one included.
+            forget_timezone(request, obj)
+
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,40 @@
+from __future__ import unicode_literals
+
+# Django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+# Local Apps
+from .hashers import hashing_pool
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` checking passwords on ``users.hashers.hashing_pool``.
+
+    Unlike ``ModelBackend``, outdated hashes are only rehashed on login when
+    ``PASSWORD_REHASH_ON_LOGIN`` is set. The new hash also goes through the pool, and
+    only the ``password`` column is written.
+    """
+
+    def authenticate(self, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a non-existing user.
+            hashing_pool.make_password(password)
+            return None
+
+        is_correct, must_update = hashing_pool.check_password(password, user.password)
+        if not is_correct:
+            return None
+
+        if must_update and getattr(settings, 'PASSWORD_REHASH_ON_LOGIN', False):
+            user.password = hashing_pool.make_password(password)
+            user.save(update_fields=['password'])
+        return user
@@ -6,12 +6,16 @@ from django.utils.translation import ugettext_lazy as _
 
 # Local Apps
 from .models import User
+from core.widgets import CachedTimezoneSelect
 
 
 class UserProfileForm(forms.ModelForm):
     class Meta:
         model = User
         fields = ("first_name", "last_name", "email", "timezone", "country")
+        widgets = {
+            "timezone": CachedTimezoneSelect,
+        }
 
         help_texts = {
             "first_name": _("If provided, this information will be public."),
@@ -0,0 +1,132 @@
+from __future__ import unicode_literals
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+logger = logging.getLogger('users.hashers')
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the work factor taken from
+    ``PASSWORD_HASHING_ITERATIONS``. Hashes keep the ``pbkdf2_sha256`` algorithm and
+    record their iterations, so existing ones verify unchanged and are rehashed to
+    the configured factor on login when ``PASSWORD_REHASH_ON_LOGIN`` is set.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASHING_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
+
+
+def _init_worker(settings_module):
+    # Only does anything for pools that spawn rather than fork their processes.
+    # ``ProcessPoolExecutor`` takes an initializer from Python 3.7; before that its
+    # processes are always forked, with settings already loaded.
+    if not settings.configured:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        import django
+        django.setup()
+
+
+def _check_password(password, encoded):
+    """
+    Returns ``(is_correct, must_update,)``, as computed by Django's ``check_password()``.
+    """
+    must_update = []
+    is_correct = hashers.check_password(password, encoded, setter=lambda raw_password: must_update.append(True))
+    return is_correct, bool(must_update)
+
+
+class HashingPool(object):
+    """
+    Runs password hashing on a bounded pool of ``PASSWORD_HASHING_POOL_SIZE`` worker
+    processes. The calling thread waits on the result without holding the GIL, so
+    the other request threads of the process keep running, and no more than the
+    pool size of hashes are ever computed at once.
+
+    With a pool size of ``0`` hashing runs inline, in the calling thread, which is
+    also the fallback when the pool doesn't answer within ``PASSWORD_HASHING_TIMEOUT``
+    seconds. A pool broken by a dead worker is rebuilt once per call.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return getattr(settings, 'PASSWORD_HASHING_POOL_SIZE', 0)
+
+    def get_executor(self):
+        # Checked by pid, as a pool must not be shared with forked children.
+        if self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor_pid != os.getpid():
+                    kwargs = {}
+                    if sys.version_info >= (3, 7):
+                        kwargs.update(initializer=_init_worker, initargs=(settings.SETTINGS_MODULE,))
+                    self._executor = ProcessPoolExecutor(max_workers=self.size, **kwargs)
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def discard_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._executor_pid = None
+        executor.shutdown(wait=False)
+
+    def run(self, fnc, *args):
+        if not self.size:
+            return fnc(*args)
+
+        timeout = getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 10)
+        for _ in range(2):
+            executor = self.get_executor()
+            try:
+                future = executor.submit(fnc, *args)
+                return future.result(timeout=timeout)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); every pending future fails with it.
+                logger.warning("Password hashing pool is broken; rebuilding it.", exc_info=True)
+                self.discard_executor(executor)
+            except TimeoutError:
+                future.cancel()
+                logger.warning("Password hashing pool timed out after %ss; hashing in-process.", timeout)
+                return fnc(*args)
+
+        logger.error("Password hashing pool broke again after a rebuild; hashing in-process.")
+        return fnc(*args)
+
+    def make_password(self, password):
+        return self.run(hashers.make_password, password)
+
+    def check_password(self, password, encoded):
+        """
+        Returns ``(is_correct, must_update,)``, ``must_update`` telling whether the hash
+        differs from the preferred hasher or its work factor.
+        """
+        if password is None or not hashers.is_password_usable(encoded):
+            return False, False
+        return self.run(_check_password, password, encoded)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+            self._executor_pid = None
+
+
+hashing_pool = HashingPool()
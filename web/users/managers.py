@@ -5,6 +5,9 @@ from django.contrib.auth.models import UserManager as DjangoUserManager
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+# Local Apps
+from .hashers import hashing_pool
+
 
 class UserManager(DjangoUserManager):
     """
@@ -21,7 +24,9 @@ class UserManager(DjangoUserManager):
 
         user = get_user_model()(email=email, **extra_fields)
         if password is not None:
-            user.set_password(password)
+            # What ``set_password()`` does, with the hashing done on the pool.
+            user.password = hashing_pool.make_password(password)
+            user._password = password
 
         # The user has not logged in
         user.last_login = timezone.now()
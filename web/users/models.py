@@ -14,6 +14,8 @@ class User(GeoMixin, AbstractUser, BaseModel):
     tracker = FieldTracker()
     objects = UserManager()
 
+    save_changed_fields_only = True
+
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
@@ -43,5 +45,6 @@ class User(GeoMixin, AbstractUser, BaseModel):
         else:
             return ''
 
-    def get_serialization_excludes(self):
-        return super(User, self).get_serialization_excludes() + ["is_active", "is_staff", "is_superuser", "password", "date_joined", "timezone", "country"]
+    @classmethod
+    def get_serialization_excludes(cls):
+        return super(User, cls).get_serialization_excludes() + ["is_active", "is_staff", "is_superuser", "password", "date_joined", "timezone", "country"]
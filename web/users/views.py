@@ -16,6 +16,7 @@ from django.utils.decorators import method_decorator
 
 # Local Apps
 from .forms import UserProfileForm  # ,LoginForm
+from core.middleware import forget_timezone
 
 
 def logout_view(request):
@@ -85,6 +86,7 @@ class OwnProfileView(FormView):
 
     def form_valid(self, form):
         form.save(self.request.user)
+        forget_timezone(self.request, self.request.user)
         messages.add_message(self.request, messages.SUCCESS, "Profile successfully updated.")
         return redirect(self.get_success_url())
 